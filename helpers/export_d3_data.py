@@ -10,6 +10,7 @@ import sys
 import os
 import csv
 import struct
+from collections import deque
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 
@@ -89,9 +90,9 @@ def iter_all_archives(buf: bytes, max_depth: int = 3):
         arc = is_probable_tama_archive(buf, off)
         if arc:
             tops.append((f"off=0x{off:X}", arc))
-    queue = [(p, a, 0) for (p, a) in tops]
+    queue = deque((p, a, 0) for (p, a) in tops)
     while queue:
-        path, arc, depth = queue.pop(0)
+        path, arc, depth = queue.popleft()
         yield path, arc
         if depth >= max_depth:
             continue
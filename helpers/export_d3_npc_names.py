@@ -9,6 +9,7 @@ Only extracts names for the NPC string indexes defined in DTHREE_STRING_INDEXES.
 """
 
 import sys, csv, struct, re
+from collections import deque
 from dataclasses import dataclass
 from typing import Optional, List, Tuple, Dict
 
@@ -83,9 +84,9 @@ def iter_all_archives(buf, max_depth=3):
     for off in range(0,len(buf)-4,2):
         arc=is_probable_tama_archive(buf,off)
         if arc: tops.append((f"off=0x{off:X}",arc))
-    q=[(p,a,0) for (p,a) in tops]
+    q=deque((p,a,0) for (p,a) in tops)
     while q:
-        path,arc,depth=q.pop(0)
+        path,arc,depth=q.popleft()
         yield path,arc
         if depth>=max_depth: continue
         for idx,e in enumerate(arc.entries):
@@ -26,8 +26,9 @@ import sys
 import os
 import csv
 import struct
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import Deque, List, Dict, Optional, Tuple
 
 # -------------------------------------------------------------------
 # CONFIG: Digivice-specific
@@ -131,9 +132,9 @@ def iter_all_archives(buf: bytes, max_depth: int = 3):
         if arc:
             tops.append((f"off=0x{off:X}", arc))
 
-    queue: List[Tuple[str, Archive, int]] = [(p,a,0) for (p,a) in tops]
+    queue: Deque[Tuple[str, Archive, int]] = deque((p,a,0) for (p,a) in tops)
     while queue:
-        path, arc, depth = queue.pop(0)
+        path, arc, depth = queue.popleft()
         yield path, arc
         if depth >= max_depth:
             continue
@@ -11,6 +11,7 @@ Usage:
 """
 
 import sys, os, csv, struct, re
+from collections import deque
 from typing import List, Dict, Optional, Tuple
 
 # -------------------------------------------------------------------
@@ -59,9 +60,9 @@ def iter_archives(buf, depth=3):
     for off in range(0, len(buf)-4, 2):
         arc=is_probable_tama_archive(buf, off)
         if arc: tops.append((f"off=0x{off:X}", arc))
-    q=[(p,a,0) for (p,a) in tops]
+    q=deque((p,a,0) for (p,a) in tops)
     while q:
-        path,arc,d=q.pop(0)
+        path,arc,d=q.popleft()
         yield path,arc
         if d>=depth: continue
         base,count,entries=arc
@@ -11,7 +11,8 @@ CSV columns:
     string_index, DigimonName, Stage, Power, Unknown1, Unknown2
 """
 
-import argparse, csv, struct, sys, re
+import argparse, csv, mmap, os, shutil, struct, sys, re
+from collections import deque
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional
 
@@ -31,6 +32,7 @@ ALLOWED_PATHS = [
 
 # Names containing these characters are NOT written back
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*=,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 
 # ---------------------------------------------------------------
 # LE HELPERS
@@ -97,9 +99,9 @@ def iter_all_archives(buf: bytes, max_depth=3):
         if arc:
             tops.append((f"off=0x{off:X}", arc))
 
-    queue = [(p, a, 0) for (p, a) in tops]
+    queue = deque((p, a, 0) for (p, a) in tops)
     while queue:
-        path, arc, depth = queue.pop(0)
+        path, arc, depth = queue.popleft()
         yield path, arc
         if depth >= max_depth:
             continue
@@ -122,7 +124,7 @@ def is_probable_text_archive(view: bytes) -> Optional[TextArchive]:
         if w < prev or w*2 >= len(view): 
             return None
         prev = w
-    return TextArchive(0, "", n, offsets, memoryview(view))
+    return TextArchive(0, "", n, offsets, bytes(view))
 
 def parse_text_archive(view: bytes, abs_off: int, path: str):
     ta = is_probable_text_archive(view)
@@ -142,8 +144,9 @@ def extract_allowed_text_archives(buf: bytes):
             length = e.decomp_len if e.decomp_len > 0 else e.comp_len
             if length <= 0:
                 continue
-            view = buf[abs_off:abs_off+length]
-            ta = parse_text_archive(view, abs_off, f"{path}/idx={idx}")
+            # Zero-copy window; released right away so the mapped BIN can still be closed.
+            with memoryview(buf)[abs_off:abs_off+length] as view:
+                ta = parse_text_archive(view, abs_off, f"{path}/idx={idx}")
             if ta and ta.path in ALLOWED_PATHS:
                 found[ta.path] = ta
     return [found[p] for p in ALLOWED_PATHS if p in found]
@@ -197,22 +200,77 @@ def string_capacity_bytes(ta: TextArchive, si: int) -> int:
 # ---------------------------------------------------------------
 # REPLACE MAP
 # ---------------------------------------------------------------
+def compile_rules(rules: List[Tuple[str, str]]):
+    """
+    Compile (src, dst) rules into one alternation regex + replacement table.
+    Alternatives are longest-first, so each position takes the longest match,
+    and output of one rule is never rewritten by a later rule.
+    Each alternative is its own group; table[m.lastindex] is its replacement.
+    """
+    first: Dict[str, str] = {}
+    for a, b in sorted(rules, key=lambda x: len(x[0]), reverse=True):
+        if a:
+            first.setdefault(a, b)
+    if not first:
+        return None, [None]
+    pattern = re.compile("|".join(f"({re.escape(a)})" for a in first))
+    return pattern, [None] + list(first.values())
+
 def load_replace_map(path: str):
     rules = []
     with open(path, "r", encoding="utf-8-sig") as f:
         for row in csv.reader(f):
             if len(row) >= 2:
                 rules.append((row[0], row[1]))
-    # longest-first
-    rules.sort(key=lambda x: len(x[0]), reverse=True)
     inv = [(b, a) for (a,b) in rules]
-    inv.sort(key=lambda x: len(x[0]), reverse=True)
-    return rules, inv
+    return compile_rules(rules), compile_rules(inv)
 
 def apply_rules(s: str, rules):
-    for a,b in rules:
-        s = s.replace(a, b)
-    return s
+    pattern, table = rules
+    if pattern is None:
+        return s
+    return pattern.sub(lambda m: table[m.lastindex], s)
+
+# ---------------------------------------------------------------
+# BIN I/O
+# ---------------------------------------------------------------
+def load_bin(path: str) -> mmap.mmap:
+    # Copy-on-write map: pages are read on demand and patches stay private until saved.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+def merge_patches(patches: List[Tuple[int, bytes]]):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs = []
+    for k in sorted(range(len(patches)), key=lambda k: patches[k][0]):
+        off, blob = patches[k]
+        end = off + len(blob)
+        if runs and off <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off, end, [k]])
+    for start, end, members in runs:
+        run = bytearray(end - start)
+        for k in sorted(members):
+            off, blob = patches[k]
+            run[off-start:off-start+len(blob)] = blob
+        yield start, run
+
+def save_patches(src_path: str, out_path: str, patches: List[Tuple[int, bytes]]):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path, out_path)):
+        shutil.copyfile(src_path, out_path)
+    fd = os.open(out_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+    try:
+        for start, run in merge_patches(patches):
+            if hasattr(os, "pwrite"):
+                os.pwrite(fd, run, start)
+            else:
+                os.lseek(fd, start, os.SEEK_SET)
+                os.write(fd, run)
+    finally:
+        os.close(fd)
 
 # ---------------------------------------------------------------
 # MAIN
@@ -228,8 +286,7 @@ def main():
     args = ap.parse_args()
 
     # Load bin
-    with open(args.bin, "rb") as f:
-        data = bytearray(f.read())
+    data = load_bin(args.bin)
 
     # Load CSV
     rows = []
@@ -287,11 +344,9 @@ def main():
     # -------------------------------------------------------
     # Write back partner table
     # -------------------------------------------------------
-    for i, w in enumerate(words):
-        rec = i // 4
-        pos = i % 4
-        off = BASE_PARTNER + rec * RECORD_SIZE + pos * 2
-        struct.pack_into("<H", data, off, w)
+    # RECORD_SIZE is exactly 4 words, so the records are back to back: one write covers the table.
+    partner_blob = struct.pack(f"<{len(words)}H", *words)
+    data[BASE_PARTNER:BASE_PARTNER + len(partner_blob)] = partner_blob
 
     # -------------------------------------------------------
     # Update names
@@ -304,20 +359,26 @@ def main():
 
     fwd, inv = load_replace_map(args.replace_map)
     name_changes = 0
+    patches = [(BASE_PARTNER, partner_blob)]
+    n_index_map = len(index_map)
 
+    # Cheapest rejections first: bounds, forbidden chars, empty slot; encode last.
     for r in rows:
         si = int(r["string_index"])
-        name = r["DigimonName"]
-        if any(ch in FORBIDDEN_CHARS for ch in name):
+        if not (0 <= si < n_index_map):
             continue
-        if not (0 <= si < len(index_map)):
+        name = r["DigimonName"]
+        if FORBIDDEN_RE.search(name):
             continue
 
         ta, slot = index_map[si]
+        cap = string_capacity_bytes(ta, slot)
+        if cap == 0:
+            continue
+
         tag = apply_rules(name, inv)
         codes = encode_from_tagstring(tag)
         enc = encode_to_bytes(codes)
-        cap = string_capacity_bytes(ta, slot)
 
         if len(enc) > cap:
             if args.overflow == "truncate":
@@ -327,14 +388,14 @@ def main():
                 continue
 
         abs_write = ta.base_off + ta.offsets_word[slot] * 2
-        data[abs_write:abs_write+len(enc)] = enc
+        patches.append((abs_write, enc))
         name_changes += 1
 
     # -------------------------------------------------------
     # Save
     # -------------------------------------------------------
-    with open(args.out, "wb") as f:
-        f.write(data)
+    data.close()
+    save_patches(args.bin, args.out, patches)
 
     print(f"[DONE] Updated stats + {name_changes} name changes → {args.out}")
 
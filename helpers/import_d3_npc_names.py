@@ -12,10 +12,16 @@ NEW RULE:
     of the old name (after decoding via replace_map). If not equal → skip.
 """
 
-import sys, csv, struct, re
+import sys, os, csv, mmap, shutil, struct, re
+from collections import deque
 from dataclasses import dataclass
 from typing import Optional, List, Dict
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 # ------------------------------------------------------------
 # NPC STRING INDEXES
 # ------------------------------------------------------------
@@ -33,6 +39,7 @@ ALLOWED_PATHS = [
 ]
 
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 
 # ------------------------------------------------------------
 # Helpers / structures
@@ -47,6 +54,9 @@ class ArchEntry:
     comp_len:int
     decomp_len:int
 
+# One TAMA table row; with NumPy, Archive.entries is a structured array of these.
+ARCH_ENTRY_DTYPE=[("flags","<u4"),("offset","<u4"),("comp_len","<u4"),("decomp_len","<u4")]
+
 @dataclass
 class Archive:
     base_off:int
@@ -68,6 +78,11 @@ def is_probable_tama_archive(buf,abs_off):
     c=le16(buf,abs_off+2)
     if not(1<=c<=65535): return None
     if abs_off+4+c*16>len(buf): return None
+    if np is not None:
+        # copy() keeps the table off the BIN buffer so the mmap can be closed later.
+        ents=np.frombuffer(buf,dtype=ARCH_ENTRY_DTYPE,count=c,offset=abs_off+4).copy()
+        if (ents["offset"].astype(np.int64)+abs_off>len(buf)).any(): return None
+        return Archive(abs_off,c,ents,buf)
     ents=[]
     for i in range(c):
         e=abs_off+4+i*16
@@ -79,31 +94,77 @@ def is_probable_tama_archive(buf,abs_off):
         ents.append(ArchEntry(fl,off,cl,dl))
     return Archive(abs_off,c,ents,buf)
 
-def iter_all_archives(buf,max_depth=3):
+def iter_entries(arc,raw_only=False):
+    """(idx, flags, offset, comp_len, decomp_len) per entry; raw_only keeps (flags & 0xF)==0."""
+    ents=arc.entries
+    if np is not None and isinstance(ents,np.ndarray):
+        idxs=np.nonzero((ents["flags"]&0xF)==0)[0] if raw_only else np.arange(len(ents))
+        sel=ents[idxs]
+        return zip(idxs.tolist(),sel["flags"].tolist(),sel["offset"].tolist(),
+                   sel["comp_len"].tolist(),sel["decomp_len"].tolist())
+    return ((i,e.flags,e.offset,e.comp_len,e.decomp_len) for i,e in enumerate(ents)
+            if not raw_only or (e.flags&0xF)==0)
+
+def top_offsets_for(paths):
+    """Top-level archive offsets named by the 'off=0x...' head of each path."""
+    offs=set()
+    for p in paths:
+        head=p.split("/",1)[0]
+        if head.startswith("off="):
+            offs.add(int(head[4:],16))
+    return sorted(offs)
+
+def on_allowed_route(path,allowed_paths):
+    return any(ap==path or ap.startswith(path+"/") for ap in allowed_paths)
+
+def iter_all_archives(buf,allowed_paths,max_depth=3):
+    """
+    BFS over TAMA archives. Only the top offsets named in allowed_paths are
+    probed and branches that cannot lead to an allowed path are pruned.
+    """
     tops=[]
-    for off in range(0,len(buf)-4,2):
+    for off in top_offsets_for(allowed_paths):
         a=is_probable_tama_archive(buf,off)
         if a: tops.append((f"off=0x{off:X}",a))
-    q=[(p,a,0) for p,a in tops]
+    q=deque((p,a,0) for p,a in tops)
     while q:
-        path,arc,depth=q.pop(0)
+        path,arc,depth=q.popleft()
         yield path,arc
         if depth>=max_depth: continue
-        for idx,e in enumerate(arc.entries):
-            sub=is_probable_tama_archive(buf,arc.base_off+e.offset)
+        for idx,_,off,_,_ in iter_entries(arc):
+            child=f"{path}/idx={idx}"
+            if not on_allowed_route(child,allowed_paths): continue
+            sub=is_probable_tama_archive(buf,arc.base_off+off)
             if sub:
-                q.append((f"{path}/idx={idx}",sub,depth+1))
+                q.append((child,sub,depth+1))
+
+# Process-local cache; id() reuse is harmless because the BIN buffer lives for the whole run.
+_ARCHIVE_CACHE={}
+
+def all_archives(buf,allowed_paths,max_depth=3):
+    """Materialized iter_all_archives(), computed once per buffer."""
+    key=(id(buf),len(buf),max_depth,tuple(allowed_paths))
+    arcs=_ARCHIVE_CACHE.get(key)
+    if arcs is None:
+        arcs=list(iter_all_archives(buf,allowed_paths,max_depth))
+        _ARCHIVE_CACHE[key]=arcs
+    return arcs
 
 def is_probable_text_archive(view):
     if len(view)<4: return None
     n=le16(view,0)
     if not(1<=n<=20000): return None
     if 2+2*n>len(view): return None
-    offs=[le16(view,2+2*i) for i in range(n)]
-    prev=0
-    for w in offs:
-        if w<prev or w*2>=len(view): return None
-        prev=w
+    if np is not None:
+        arr=np.frombuffer(view,dtype="<u2",count=n,offset=2).astype(np.int32)
+        if (arr[1:]<arr[:-1]).any() or int(arr[-1])*2>=len(view): return None
+        offs=arr.tolist()
+    else:
+        offs=[le16(view,2+2*i) for i in range(n)]
+        prev=0
+        for w in offs:
+            if w<prev or w*2>=len(view): return None
+            prev=w
     return TextArchive(0,"",n,offs,bytearray(view))
 
 def parse_text_archive(view,abs_off,path):
@@ -117,10 +178,13 @@ def parse_text_archive(view,abs_off,path):
 # ------------------------------------------------------------
 # STRING DECODING
 # ------------------------------------------------------------
-def decode_old_string(ta, si, fwd_rules):
+def decode_old_string(ta, si, fwd_rules, cache=None):
     """
     Decode existing old name → readable text using forward replace_map.
     Returns a simple visible-name string (e.g., "Vmon").
+
+    If a cache dict is given, results are keyed on the raw "<####>" tag
+    string so identical names in any archive are only decoded once.
     """
     start = ta.offsets_word[si]*2
     p = start
@@ -137,39 +201,75 @@ def decode_old_string(ta, si, fwd_rules):
 
     # Convert tags → visible chars via forward replace_map
     raw = "".join(out_tags)
+    if cache is not None:
+        hit = cache.get(raw)
+        if hit is not None:
+            return hit
+
+    decoded = raw
     # Apply all <####> → character
     for k,v in fwd_rules:
-        raw = raw.replace(k, v)
+        decoded = decoded.replace(k, v)
 
-    return raw  # visible, human characters
+    if cache is not None:
+        cache[raw] = decoded
+    return decoded  # visible, human characters
+
+def visible_code_lengths(fwd_rules):
+    """
+    Decoded length of each code when every forward rule that can match a
+    "<####>" tag string is a single-tag rule; None if decoding is needed.
+    Unmapped codes stay "<####>" (6 characters) after decoding.
+    """
+    tag_chars=set("<>0123456789ABCDEFabcdef")
+    lens={}
+    for k,v in fwd_rules:
+        m=RE_RAW.fullmatch(k)
+        # Decoded strings spell tags in uppercase, so only an uppercase key is a plain single-tag rule.
+        if m and k==k.upper():
+            lens.setdefault(int(m.group(1),16),len(v))
+        elif set(k)<=tag_chars:
+            return None
+    return lens
+
+def count_visible_codes(ta, si, code_lens):
+    """len(decode_old_string(...)) computed straight from the u16 stream."""
+    p = ta.offsets_word[si]*2
+    n = 0
+    while p+2 <= len(ta.data):
+        w = le16(ta.data, p)
+        p += 2
+        if w == 0:
+            break
+        if w >= 0xF000:
+            continue
+        n += code_lens.get(w, 6)
+    return n
 
 # ------------------------------------------------------------
 # TAG ENCODING
 # ------------------------------------------------------------
 RE_RAW = re.compile(r"<([0-9A-Fa-f]{4})>")
+RE_RAW_RUN = re.compile(r"(?:<[0-9A-Fa-f]{4}>)*")
 
-def encode_to_codes(s: str):
-    out=[]
-    i=0
-    while i<len(s):
+def encode_name_bytes(s: str):
+    """
+    "<####><####>..." -> LE16 codes + 0x0000 terminator, skipping <0000> tags.
+    The whole string must be back-to-back tags; the hex digits are decoded
+    in one fromhex() call and byte-swapped with two slice assignments.
+    """
+    i=RE_RAW_RUN.match(s).end()
+    if i!=len(s):
         if s[i]=="<":
-            m=RE_RAW.match(s,i)
-            if not m:
-                raise ValueError(f"Bad tag {s[i:i+6]}")
-            v=int(m.group(1),16)
-            if v!=0:
-                out.append(v)
-            i=m.end()
-        else:
-            raise ValueError(f"Literal char {s[i]!r} in encoded string")
-    return out
-
-def encode_bytes(codes):
-    b=bytearray()
-    for c in codes:
-        b+=struct.pack("<H",c)
-    b+=b"\x00\x00"
-    return b
+            raise ValueError(f"Bad tag {s[i:i+6]}")
+        raise ValueError(f"Literal char {s[i]!r} in encoded string")
+    # '<' only starts a tag here, so every "<0000>" hit is a whole, aligned tag.
+    be=bytes.fromhex(s.replace("<0000>","").replace("<","").replace(">",""))
+    n=len(be)
+    out=bytearray(n+2)
+    out[0:n:2]=be[1::2]
+    out[1:n:2]=be[0::2]
+    return bytes(out)
 
 def string_capacity(ta,si):
     start=ta.offsets_word[si]*2
@@ -195,10 +295,68 @@ def load_replace_map(path):
     inv.sort(key=lambda x:len(x[0]),reverse=True)
     return fwd,inv
 
-def apply_rules(s,rules):
+def compile_rules(rules):
+    """One alternation regex over longest-first sources, one group per rule + 1-indexed replacement list."""
+    first={}
     for a,b in rules:
-        s=s.replace(a,b)
-    return s
+        if a: first.setdefault(a,b)
+    if not first:
+        return None,[None]
+    pattern=re.compile("|".join(f"({re.escape(a)})" for a in first))
+    return pattern,[None]+list(first.values())
+
+def apply_rules_fast(s,pattern,table):
+    if pattern is None: return s
+    return pattern.sub(lambda m: table[m.lastindex],s)
+
+# ------------------------------------------------------------
+# CSV I/O
+# ------------------------------------------------------------
+def read_csv_rows(path):
+    """CSV rows as dicts of strings."""
+    with open(path,"r",encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+# ------------------------------------------------------------
+# BIN I/O
+# ------------------------------------------------------------
+def load_bin(path):
+    # Copy-on-write map: pages are read on demand and patches stay private until saved.
+    with open(path,"rb") as f:
+        return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_COPY)
+
+def merge_patches(patches):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs=[]
+    for k in sorted(range(len(patches)),key=lambda k:patches[k][0]):
+        off,blob=patches[k]
+        end=off+len(blob)
+        if runs and off<=runs[-1][1]:
+            runs[-1][1]=max(runs[-1][1],end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off,end,[k]])
+    for start,end,members in runs:
+        run=bytearray(end-start)
+        for k in sorted(members):
+            off,blob=patches[k]
+            run[off-start:off-start+len(blob)]=blob
+        yield start,run
+
+def save_patches(src_path,out_path,patches):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path,out_path)):
+        shutil.copyfile(src_path,out_path)
+    fd=os.open(out_path,os.O_WRONLY|getattr(os,"O_BINARY",0))
+    try:
+        for start,run in merge_patches(patches):
+            if hasattr(os,"pwrite"):
+                os.pwrite(fd,run,start)
+            else:
+                os.lseek(fd,start,os.SEEK_SET)
+                os.write(fd,run)
+    finally:
+        os.close(fd)
 
 # ------------------------------------------------------------
 # MAIN
@@ -213,33 +371,39 @@ def main():
     replace_map=sys.argv[3]
     out_path=sys.argv[-1]
 
-    with open(bin_path,"rb") as f:
-        data=bytearray(f.read())
+    data=load_bin(bin_path)
 
     npc_map={}
-    with open(csv_path,"r",encoding="utf-8-sig") as f:
-        for r in csv.DictReader(f):
-            if "string_index" not in r or "name" not in r:
-                continue
-            try:
-                si=int(r["string_index"])
-            except:
-                continue
-            name=r["name"].strip()
-            if si in DTHREE_STRING_INDEXES and name:
-                npc_map[si]=name
+    for r in read_csv_rows(csv_path):
+        if "string_index" not in r or "name" not in r:
+            continue
+        try:
+            si=int(r["string_index"])
+        except:
+            continue
+        name=r["name"].strip()
+        if si in DTHREE_STRING_INDEXES and name:
+            npc_map[si]=name
 
     fwd,inv=load_replace_map(replace_map)
+    inv_pattern,inv_table=compile_rules(inv)
+    decode_cache={}
+    code_lens=visible_code_lengths(fwd)
+    patches=[]
     changes=0
 
-    for path,arc in iter_all_archives(data,3):
-        for idx,e in enumerate(arc.entries):
-            if (e.flags&0xF)!=0: continue
-            abs_off=arc.base_off+e.offset
-            length=e.decomp_len if e.decomp_len>0 else e.comp_len
+    # Only archives whose children can be an allowed text archive are worth walking.
+    archives=[(p,a) for p,a in all_archives(data,ALLOWED_PATHS,3)
+              if any(ap.startswith(p+"/idx=") for ap in ALLOWED_PATHS)]
+
+    for path,arc in archives:
+        for idx,_,off,clen,dlen in iter_entries(arc,raw_only=True):
+            abs_off=arc.base_off+off
+            length=dlen if dlen>0 else clen
             if length<=0: continue
-            view=data[abs_off:abs_off+length]
-            ta=parse_text_archive(view,abs_off,f"{path}/idx={idx}")
+            # Zero-copy window; only archives that parse get copied into TextArchive.data.
+            with memoryview(data)[abs_off:abs_off+length] as view:
+                ta=parse_text_archive(view,abs_off,f"{path}/idx={idx}")
             if not ta: continue
             if ta.path not in ALLOWED_PATHS: continue
 
@@ -248,30 +412,32 @@ def main():
                     continue
 
                 # 1) FORBIDDEN_CHARS character check
-                if any(c in FORBIDDEN_CHARS for c in new_name):
+                if FORBIDDEN_RE.search(new_name):
                     print(f"[WARN] string_index {si}: FORBIDDEN_CHARS characters in {new_name!r}. Skipping.")
                     continue
 
-                # 2) Obtain old name (decoded)
-                old_name = decode_old_string(ta, si, fwd)
+                # 2) Old name length (decoded only if the map needs it)
+                if code_lens is not None:
+                    old_len = count_visible_codes(ta, si, code_lens)
+                else:
+                    old_len = len(decode_old_string(ta, si, fwd, decode_cache))
 
                 # 3) Character count comparison
-                if len(new_name) != len(old_name):
+                if len(new_name) != old_len:
                     print(f"[WARN] string_index {si}: name length mismatch "
-                          f"(old={len(old_name)}, new={len(new_name)}). Skipping.")
+                          f"(old={old_len}, new={len(new_name)}). Skipping.")
                     continue
 
                 # 4) Convert visible → <####> tags
-                encoded = apply_rules(new_name, inv)
+                encoded = apply_rules_fast(new_name, inv_pattern, inv_table)
 
                 try:
-                    codes = encode_to_codes(encoded)
+                    enc = encode_name_bytes(encoded)
                 except ValueError as e:
                     print(f"[WARN] string_index {si}: encode error for name "
                           f"{new_name!r} ({e}). Skipping.")
                     continue
 
-                enc = encode_bytes(codes)
                 cap = string_capacity(ta, si)
 
                 if len(enc)>cap:
@@ -280,11 +446,11 @@ def main():
                     continue
 
                 write_off = ta.base_off + ta.offsets_word[si]*2
-                data[write_off:write_off+len(enc)] = enc
+                patches.append((write_off,enc))
                 changes+=1
 
-    with open(out_path,"wb") as f:
-        f.write(data)
+    data.close()
+    save_patches(bin_path,out_path,patches)
 
     print(f"[DONE] Applied {changes} NPC name changes → {out_path}")
 
@@ -22,9 +22,15 @@ Usage:
     python import_digivice_data.py Digivice.bin data.csv replace_map.csv --out Digivice.bin
 """
 
-import sys, os, csv, struct, argparse, re
+import sys, os, csv, mmap, shutil, struct, argparse, re
+from collections import deque
 from dataclasses import dataclass
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 # -----------------------------------------------------------------------
 # CONFIG
 # -----------------------------------------------------------------------
@@ -33,6 +39,7 @@ BASE_STATS   = 0x00097F2A    # first stats record used
 RECORD_SIZE  = 10            # bytes per record (5×LE16)
 MAX_PARTNERS = 112           # same as extractor
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*=,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 # DO NOT CHANGE THE MAX_POWER. IT WILL BREAK YOUR BIN FILE AND DIGIVICE WON'T BE REPAIRABLE.
 MAX_POWER = 225
 
@@ -40,11 +47,13 @@ MAX_POWER = 225
 # Little-Endian helpers
 # -----------------------------------------------------------------------
 def le16(b, o): return struct.unpack_from("<H", b, o)[0]
-def pack16(v): return struct.pack("<H", v)
 
 # -----------------------------------------------------------------------
 # Archive + text decoding (compat with extractor)
 # -----------------------------------------------------------------------
+# One TAMA table row; with NumPy, archive entries are a structured array of these.
+ARCH_ENTRY_DTYPE = [("flags","<u4"), ("off","<u4"), ("clen","<u4"), ("dlen","<u4")]
+
 def is_probable_tama_archive(buf, abs_off):
     if abs_off + 4 > len(buf): return None
     if le16(buf, abs_off) != 0x3232: return None
@@ -53,6 +62,12 @@ def is_probable_tama_archive(buf, abs_off):
     table_end = abs_off + 4 + count*16
     if table_end > len(buf): return None
 
+    if np is not None:
+        # copy() keeps the table off the BIN buffer so the mmap can be closed later.
+        entries = np.frombuffer(buf, dtype=ARCH_ENTRY_DTYPE, count=count, offset=abs_off+4).copy()
+        if (entries["off"].astype(np.int64) + abs_off > len(buf)).any(): return None
+        return (abs_off, count, entries)
+
     entries = []
     for i in range(count):
         e = abs_off + 4 + i*16
@@ -64,26 +79,53 @@ def is_probable_tama_archive(buf, abs_off):
         entries.append((flags, off, clen, dlen))
     return (abs_off, count, entries)
 
-def iter_archives(buf, depth=3):
+def iter_entries(entries, raw_only=False):
+    """(idx, flags, off, clen, dlen) per entry; raw_only keeps (flags & 0xF)==0."""
+    if np is not None and isinstance(entries, np.ndarray):
+        idxs=np.nonzero((entries["flags"] & 0xF)==0)[0] if raw_only else np.arange(len(entries))
+        sel=entries[idxs]
+        return zip(idxs.tolist(), sel["flags"].tolist(), sel["off"].tolist(),
+                   sel["clen"].tolist(), sel["dlen"].tolist())
+    return ((i,)+tuple(e) for i,e in enumerate(entries) if not raw_only or (e[0] & 0xF)==0)
+
+def top_offsets_for(paths):
+    """Top-level archive offsets named by the 'off=0x...' head of each path."""
+    offs=set()
+    for p in paths:
+        head=p.split("/",1)[0]
+        if head.startswith("off="): offs.add(int(head[4:],16))
+    return sorted(offs)
+
+def on_allowed_route(path, allowed_paths):
+    return any(ap==path or ap.startswith(path+"/") for ap in allowed_paths)
+
+def iter_archives(buf, allowed_paths, depth=3):
+    # Probe only the top offsets named in allowed_paths and prune unrelated branches.
     tops=[]
-    for off in range(0, len(buf)-4, 2):
+    for off in top_offsets_for(allowed_paths):
         arc=is_probable_tama_archive(buf, off)
         if arc: tops.append((f"off=0x{off:X}", arc))
-    q=[(p,a,0) for (p,a) in tops]
+    q=deque((p,a,0) for (p,a) in tops)
     while q:
-        path, arc, d=q.pop(0)
+        path, arc, d=q.popleft()
         yield path,arc
         if d>=depth: continue
         base,count,entries=arc
-        for i,(flags,off,_,_) in enumerate(entries):
+        for i,flags,off,_,_ in iter_entries(entries):
+            child=f"{path}/idx={i}"
+            if not on_allowed_route(child, allowed_paths): continue
             sub=is_probable_tama_archive(buf, base+off)
-            if sub: q.append((f"{path}/idx={i}", sub, d+1))
+            if sub: q.append((child, sub, d+1))
 
 def is_text_archive(view):
     if len(view)<4: return None
     n=le16(view,0)
     if not (1<=n<=20000): return None
     if 2+2*n>len(view): return None
+    if np is not None:
+        arr=np.frombuffer(view,dtype="<u2",count=n,offset=2).astype(np.int32)
+        if (arr[1:]<arr[:-1]).any() or int(arr[-1])*2>=len(view): return None
+        return (n, arr.tolist())
     offs=[le16(view,2+2*i) for i in range(n)]
     prev=0
     for w in offs:
@@ -91,18 +133,18 @@ def is_text_archive(view):
         prev=w
     return (n, offs)
 
-def extract_text_archives(buf):
+def extract_text_archives(buf, allowed_paths):
     out=[]
-    for path,arc in iter_archives(buf):
+    for path,arc in iter_archives(buf, allowed_paths):
         base,count,entries=arc
-        for idx,(flags,off,clen,dlen) in enumerate(entries):
-            if (flags & 0xF)!=0: continue
+        for idx,flags,off,clen,dlen in iter_entries(entries, raw_only=True):
             abs_off=base+off
             size=dlen if dlen>0 else clen
             if size<=0 or abs_off+size>len(buf): continue
-            view=buf[abs_off:abs_off+size]
-            ta=is_text_archive(view)
-            if ta: out.append((f"{path}/idx={idx}",abs_off,view,ta[0],ta[1]))
+            # Zero-copy window; only confirmed text archives are copied out.
+            with memoryview(buf)[abs_off:abs_off+size] as view:
+                ta=is_text_archive(view)
+                if ta: out.append((f"{path}/idx={idx}",abs_off,bytes(view),ta[0],ta[1]))
     return out
 
 # -----------------------------------------------------------------------
@@ -121,28 +163,84 @@ def load_reverse_replace_map(path):
     rules.sort(key=lambda x:len(x[0]),reverse=True)
     return rules
 
-def apply_reverse(text,rules):
-    for a,b in rules: text=text.replace(a,b)
-    return text
+def compile_rules(rules):
+    """One alternation regex over longest-first sources, one group per rule + 1-indexed replacement list."""
+    first={}
+    for a,b in rules:
+        if a: first.setdefault(a,b)
+    if not first: return None,[None]
+    pattern=re.compile("|".join(f"({re.escape(a)})" for a in first))
+    return pattern,[None]+list(first.values())
+
+def apply_rules_fast(text,pattern,table):
+    if pattern is None: return text
+    return pattern.sub(lambda m: table[m.lastindex],text)
 
-TAG_RAW = re.compile(r"<([0-9A-Fa-f]{4})>")
+TAG_RUN = re.compile(r"(?:<[0-9A-Fa-f]{4}>)*")
 
 def encode_tagstring_to_bytes(tag_str):
-    codes=[]
-    i=0
-    while i<len(tag_str):
-        if tag_str[i]=="<":
-            m=TAG_RAW.match(tag_str,i)
-            if not m: raise ValueError("Invalid tag format")
-            codes.append(int(m.group(1),16))
-            i=m.end()
-        else:
-            raise ValueError("Literal characters not allowed")
-    out=bytearray()
-    for c in codes: out+=pack16(c)
-    out+=pack16(0)
+    # Back-to-back tags only: decode all hex digits at once, then swap to LE16 by slicing.
+    i=TAG_RUN.match(tag_str).end()
+    if i!=len(tag_str):
+        if tag_str[i]=="<": raise ValueError("Invalid tag format")
+        raise ValueError("Literal characters not allowed")
+    be=bytes.fromhex(tag_str.replace("<","").replace(">",""))
+    n=len(be)
+    out=bytearray(n+2)
+    out[0:n:2]=be[1::2]
+    out[1:n:2]=be[0::2]
     return bytes(out)
 
+# -----------------------------------------------------------------------
+# CSV I/O
+# -----------------------------------------------------------------------
+def read_csv_rows(path):
+    """CSV rows as dicts of strings."""
+    with open(path,"r",encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+# -----------------------------------------------------------------------
+# BIN I/O
+# -----------------------------------------------------------------------
+
+def load_bin(path):
+    # Copy-on-write map: pages are read on demand and patches stay private until saved.
+    with open(path,"rb") as f:
+        return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_COPY)
+
+def merge_patches(patches):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs=[]
+    for k in sorted(range(len(patches)),key=lambda k:patches[k][0]):
+        off,blob=patches[k]
+        end=off+len(blob)
+        if runs and off<=runs[-1][1]:
+            runs[-1][1]=max(runs[-1][1],end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off,end,[k]])
+    for start,end,members in runs:
+        run=bytearray(end-start)
+        for k in sorted(members):
+            off,blob=patches[k]
+            run[off-start:off-start+len(blob)]=blob
+        yield start,run
+
+def save_patches(src_path,out_path,patches):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path,out_path)):
+        shutil.copyfile(src_path,out_path)
+    fd=os.open(out_path,os.O_WRONLY|getattr(os,"O_BINARY",0))
+    try:
+        for start,run in merge_patches(patches):
+            if hasattr(os,"pwrite"):
+                os.pwrite(fd,run,start)
+            else:
+                os.lseek(fd,start,os.SEEK_SET)
+                os.write(fd,run)
+    finally:
+        os.close(fd)
+
 # -----------------------------------------------------------------------
 # Main
 # -----------------------------------------------------------------------
@@ -156,18 +254,16 @@ def main():
     args=ap.parse_args()
 
     # Load binary
-    with open(args.bin,"rb") as f:
-        data=bytearray(f.read())
+    data=load_bin(args.bin)
 
     # Load CSV
-    rows=[]
-    with open(args.csv,"r",encoding="utf-8-sig") as f:
-        for r in csv.DictReader(f): rows.append(r)
+    rows=read_csv_rows(args.csv)
 
     rules=load_reverse_replace_map(args.replace_map)
+    rules_pattern,rules_table=compile_rules(rules)
 
     # Extract name archives
-    tas=[ta for ta in extract_text_archives(data) if ta[0] in ALLOWED_PATHS]
+    tas=[ta for ta in extract_text_archives(data, ALLOWED_PATHS) if ta[0] in ALLOWED_PATHS]
     if not tas:
         print("ERROR: No name archive found!")
         sys.exit(1)
@@ -177,6 +273,7 @@ def main():
 
     name_changes=0
     power_changes=0
+    patches=[]
 
     for r in rows:
         si=int(r["string_index"])
@@ -191,33 +288,35 @@ def main():
             # keep old power
             pass
         else:
-            struct.pack_into("<H", data, write_rec, new_power)
+            patches.append((write_rec, struct.pack("<H", new_power)))
             power_changes += 1
 
         # --- Safe Name Update ---
         new_name=r["DigimonName"]
-        if any(c in FORBIDDEN_CHARS for c in new_name): continue
+        if FORBIDDEN_RE.search(new_name): continue
 
         old_start=offsets[si]*2
         old_end=(offsets[si+1]*2) if si+1<n_strings else len(view)
-        old_bytes=view[old_start:old_end]
+        old_len=old_end-old_start
 
-        new_tag=apply_reverse(new_name,rules)
+        new_tag=apply_rules_fast(new_name,rules_pattern,rules_table)
         try: enc=encode_tagstring_to_bytes(new_tag)
         except: continue
 
-        if len(enc)!=len(old_bytes):
+        if len(enc)!=old_len:
             continue
 
         abs_pos=base_off + old_start
-        data[abs_pos:abs_pos+len(enc)]=enc
+        patches.append((abs_pos, enc))
         name_changes+=1
 
+    data.close()
+
     if args.dry:
         print("[DRY RUN] No changes written.")
         sys.exit(0)
 
-    with open(args.out,"wb") as f: f.write(data)
+    save_patches(args.bin,args.out,patches)
 
     print(f"[DONE] Power updates: {power_changes}, Name updates: {name_changes}")
     print(f"Saved → {args.out}")
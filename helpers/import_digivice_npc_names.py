@@ -16,11 +16,17 @@ Usage:
     python import_digivice_npc_names.py Digivice.bin npc.csv replace_map.csv --out Digivice.bin
 """
 
-import sys, os, csv, struct, re
+import sys, os, csv, mmap, shutil, struct, re
+from collections import deque
+
+try:
+    import numpy as np
+except Exception:
+    np = None
 
 ALLOWED_PATHS = {"off=0x194000/idx=0"}
 
-DIGIVICE_NPC_INDEXES = [
+DIGIVICE_NPC_INDEXES = frozenset({
     95, 102, 106, 109, 112, 115, 118,
     139, 140, 141, 142, 143, 144, 145, 146,
     147, 148, 149, 150, 151, 152, 153, 154,
@@ -28,15 +34,17 @@ DIGIVICE_NPC_INDEXES = [
     163, 164, 165, 166, 167, 168, 169, 170,
     171, 172, 173, 174, 175, 176, 177, 178,
     179, 180, 181
-]
+})
 
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*=,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 
 def le16(b,o): return struct.unpack_from("<H", b, o)[0]
-def pack16(v): return struct.pack("<H", v)
 
 # ---------------- Text/archive helpers (same as export script) ---------------- #
 
+ARCH_ENTRY_DTYPE = [("flags","<u4"), ("off","<u4"), ("clen","<u4"), ("dlen","<u4")]
+
 def is_probable_tama_archive(buf, abs_off):
     if abs_off+4 > len(buf): return None
     if le16(buf,abs_off)!=0x3232: return None
@@ -45,6 +53,13 @@ def is_probable_tama_archive(buf, abs_off):
     table_end = abs_off+4+count*16
     if table_end > len(buf): return None
 
+    if np is not None:
+        # One C-level parse of the whole 16-byte entry table + one vectorized bounds check.
+        tbl=np.frombuffer(buf,dtype=ARCH_ENTRY_DTYPE,count=count,offset=abs_off+4)
+        if (tbl["off"].astype(np.int64)+abs_off > len(buf)).any(): return None
+        entries=list(zip(tbl["flags"].tolist(),tbl["off"].tolist(),tbl["clen"].tolist(),tbl["dlen"].tolist()))
+        return abs_off,count,entries
+
     entries=[]
     for i in range(count):
         e=abs_off+4+i*16
@@ -56,14 +71,29 @@ def is_probable_tama_archive(buf, abs_off):
         entries.append((flags,off,clen,dlen))
     return abs_off,count,entries
 
+def candidate_offsets(buf):
+    """Even offsets whose LE16 is the TAMA magic; only these need full validation."""
+    limit=len(buf)-4
+    if np is None:
+        # LE16 0x3232 is ASCII "22"; find() scans in C, keep only word-aligned hits.
+        out=[]
+        pos=buf.find(b"22")
+        while 0<=pos<limit:
+            if pos%2==0: out.append(pos)
+            pos=buf.find(b"22",pos+1)
+        return out
+    arr=np.frombuffer(memoryview(buf),dtype="<u2",count=len(buf)//2)
+    cand=(np.nonzero(arr==0x3232)[0]*2).tolist()
+    return [off for off in cand if off<limit]
+
 def iter_archives(buf, depth=3):
     tops=[]
-    for off in range(0,len(buf)-4,2):
+    for off in candidate_offsets(buf):
         arc=is_probable_tama_archive(buf,off)
         if arc: tops.append((f"off=0x{off:X}",arc))
-    q=[(p,a,0) for (p,a) in tops]
+    q=deque((p,a,0) for (p,a) in tops)
     while q:
-        path,arc,d=q.pop(0)
+        path,arc,d=q.popleft()
         yield path,arc
         if d>=depth: continue
         base,count,entries=arc
@@ -76,6 +106,10 @@ def is_text_archive(view):
     n=le16(view,0)
     if not (1<=n<=20000): return None
     if 2+2*n > len(view): return None
+    if np is not None:
+        arr=np.frombuffer(view,dtype="<u2",count=n,offset=2).astype(np.int32)
+        if (arr[1:]<arr[:-1]).any() or int(arr[-1])*2 >= len(view): return None
+        return n,arr.tolist()
     offs=[le16(view,2+2*i) for i in range(n)]
     prev=0
     for w in offs:
@@ -83,8 +117,10 @@ def is_text_archive(view):
         prev=w
     return n,offs
 
-def extract_text_archives(buf):
+def extract_text_archives(buf, early_exit_paths=None):
+    # With early_exit_paths, stop walking as soon as every one of them has been found.
     out=[]
+    pending=set(early_exit_paths) if early_exit_paths else None
     for path,arc in iter_archives(buf):
         base,count,entries=arc
         for idx,(flags,off,clen,dlen) in enumerate(entries):
@@ -92,11 +128,41 @@ def extract_text_archives(buf):
             abs_off = base+off
             size = dlen if dlen>0 else clen
             if size<=0 or abs_off+size>len(buf): continue
-            view=buf[abs_off:abs_off+size]
-            ta=is_text_archive(view)
-            if ta: out.append((f"{path}/idx={idx}",abs_off,view,ta[0],ta[1]))
+            # Zero-copy window; only confirmed text archives are copied out.
+            with memoryview(buf)[abs_off:abs_off+size] as view:
+                ta=is_text_archive(view)
+                if not ta: continue
+                ta_path=f"{path}/idx={idx}"
+                out.append((ta_path,abs_off,bytes(view),ta[0],ta[1]))
+            if pending is not None:
+                pending.discard(ta_path)
+                if not pending: return out
     return out
 
+def find_text_archive_at(buf, target_path):
+    """Resolve "off=0x.../idx=i/.../idx=j" directly: follow the archive chain, then validate entry j as text."""
+    head,*idxs=target_path.split("/")
+    if not head.startswith("off=") or not idxs: return None
+    arc=is_probable_tama_archive(buf,int(head[4:],16))
+    for k,part in enumerate(idxs):
+        if arc is None or not part.startswith("idx="): return None
+        base,count,entries=arc
+        i=int(part[4:])
+        if i>=len(entries): return None
+        flags,off,clen,dlen=entries[i]
+        if k<len(idxs)-1:
+            arc=is_probable_tama_archive(buf,base+off)
+            continue
+        if (flags & 0xF)!=0: return None
+        abs_off=base+off
+        size=dlen if dlen>0 else clen
+        if size<=0 or abs_off+size>len(buf): return None
+        with memoryview(buf)[abs_off:abs_off+size] as view:
+            ta=is_text_archive(view)
+            if not ta: return None
+            return (target_path,abs_off,bytes(view),ta[0],ta[1])
+    return None
+
 # ---------------- Replace-map / encoding ---------------- #
 
 def load_reverse_replace_map(path):
@@ -112,28 +178,74 @@ def load_reverse_replace_map(path):
     rules.sort(key=lambda x: len(x[0]), reverse=True)
     return rules
 
-TAG_RAW = re.compile(r"<([0-9A-Fa-f]{4})>")
+TAG_RUN = re.compile(r"(?:<[0-9A-Fa-f]{4}>)*")
 
-def apply_reverse(text,rules):
-    for a,b in rules: text=text.replace(a,b)
-    return text
+def compile_rules(rules):
+    """One alternation regex over longest-first sources, one group per rule + 1-indexed replacement list."""
+    first={}
+    for a,b in rules:
+        if a: first.setdefault(a,b)
+    if not first: return None,[None]
+    pattern=re.compile("|".join(f"({re.escape(a)})" for a in first))
+    return pattern,[None]+list(first.values())
+
+def apply_rules_fast(text,pattern,table):
+    if pattern is None: return text
+    return pattern.sub(lambda m: table[m.lastindex],text)
 
 def encode_tagstring_to_bytes(tag_str):
-    codes=[]
-    i=0
-    while i<len(tag_str):
-        if tag_str[i]=="<":
-            m=TAG_RAW.match(tag_str,i)
-            if not m: raise ValueError(f"Bad tag {tag_str[i:i+6]}")
-            codes.append(int(m.group(1),16))
-            i=m.end()
-        else:
-            raise ValueError("Literal chars not allowed")
-    out=bytearray()
-    for c in codes: out+=pack16(c)
-    out+=pack16(0)
+    # Back-to-back tags only: decode all hex digits at once, then swap to LE16 by slicing.
+    i=TAG_RUN.match(tag_str).end()
+    if i!=len(tag_str):
+        if tag_str[i]=="<": raise ValueError(f"Bad tag {tag_str[i:i+6]}")
+        raise ValueError("Literal chars not allowed")
+    be=bytes.fromhex(tag_str.replace("<","").replace(">",""))
+    n=len(be)
+    out=bytearray(n+2)
+    out[0:n:2]=be[1::2]
+    out[1:n:2]=be[0::2]
     return bytes(out)
 
+# ---------------- BIN I/O ---------------- #
+
+def load_bin(path):
+    # Copy-on-write map: pages are read on demand and patches stay private until saved.
+    with open(path,"rb") as f:
+        return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_COPY)
+
+def merge_patches(patches):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs=[]
+    for k in sorted(range(len(patches)),key=lambda k:patches[k][0]):
+        off,blob=patches[k]
+        end=off+len(blob)
+        if runs and off<=runs[-1][1]:
+            runs[-1][1]=max(runs[-1][1],end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off,end,[k]])
+    for start,end,members in runs:
+        run=bytearray(end-start)
+        for k in sorted(members):
+            off,blob=patches[k]
+            run[off-start:off-start+len(blob)]=blob
+        yield start,run
+
+def save_patches(src_path,out_path,patches):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path,out_path)):
+        shutil.copyfile(src_path,out_path)
+    fd=os.open(out_path,os.O_WRONLY|getattr(os,"O_BINARY",0))
+    try:
+        for start,run in merge_patches(patches):
+            if hasattr(os,"pwrite"):
+                os.pwrite(fd,run,start)
+            else:
+                os.lseek(fd,start,os.SEEK_SET)
+                os.write(fd,run)
+    finally:
+        os.close(fd)
+
 # ---------------- Main ---------------- #
 
 def main():
@@ -146,8 +258,7 @@ def main():
     args=ap.parse_args()
 
     # Load BIN
-    with open(args.bin,"rb") as f:
-        data = bytearray(f.read())
+    data = load_bin(args.bin)
 
     # Load CSV
     rows=[]
@@ -155,14 +266,19 @@ def main():
         for r in csv.DictReader(f): rows.append(r)
 
     rules = load_reverse_replace_map(args.replace_map)
+    rules_pattern, rules_table = compile_rules(rules)
 
-    # Find text archive
-    tas = extract_text_archives(data)
+    # Find text archive: the path is known, so parse it directly; full scan only as a fallback
     name_ta = None
-    for ta in tas:
-        if ta[0] in ALLOWED_PATHS:
-            name_ta = ta
+    for p in sorted(ALLOWED_PATHS):
+        name_ta = find_text_archive_at(data, p)
+        if name_ta:
             break
+    if not name_ta:
+        for ta in extract_text_archives(data, ALLOWED_PATHS):
+            if ta[0] in ALLOWED_PATHS:
+                name_ta = ta
+                break
 
     if not name_ta:
         print("ERROR: Name archive not found!")
@@ -171,6 +287,7 @@ def main():
     _, base_off, view, n_strings, offsets = name_ta
 
     updated = 0
+    patches = []
 
     for r in rows:
         si = int(r["string_index"])
@@ -180,30 +297,30 @@ def main():
         new_name = r["name"]
 
         # forbidden chars
-        if any(c in FORBIDDEN_CHARS for c in new_name):
+        if FORBIDDEN_RE.search(new_name):
             continue
 
         old_start = offsets[si]*2
         old_end   = offsets[si+1]*2 if si+1 < n_strings else len(view)
-        old_bytes = view[old_start:old_end]
+        old_len   = old_end - old_start
 
-        new_tag = apply_reverse(new_name, rules)
+        new_tag = apply_rules_fast(new_name, rules_pattern, rules_table)
         try:
             enc = encode_tagstring_to_bytes(new_tag)
         except:
             continue
 
-        if len(enc) != len(old_bytes):
+        if len(enc) != old_len:
             # skip if length mismatch
             continue
 
         # apply patch
         abs_pos = base_off + old_start
-        data[abs_pos:abs_pos+len(enc)] = enc
+        patches.append((abs_pos, enc))
         updated += 1
 
-    with open(args.out,"wb") as f:
-        f.write(data)
+    data.close()
+    save_patches(args.bin, args.out, patches)
 
     print(f"[DONE] Updated NPC names: {updated}")
     print(f"Saved → {args.out}")
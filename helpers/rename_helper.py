@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import csv
+import os
 import sys
 import shutil
 from pathlib import Path
@@ -7,6 +8,35 @@ from pathlib import Path
 CSV_FILE = Path("rename_helper_list_digivice.csv")
 SOURCE_DIR = Path("to_rename")
 SOURCE_WAV = SOURCE_DIR / "audio.wav"
+# Hardlinked names share one file on disk, so editing any copy in place changes all of them
+# (and audio.wav). Only set to True if the copies will be replaced, never edited.
+LINK_COPIES = False
+
+
+def clone_file(src, dst):
+    """Hardlink if LINK_COPIES, else in-kernel copy (reflink-capable filesystems), then a plain copy."""
+    if LINK_COPIES:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                remaining = os.fstat(s.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(s.fileno(), d.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+
+    shutil.copyfile(src, dst)
 
 
 def main():
@@ -44,7 +74,7 @@ def main():
             sys.exit(1)
 
         print(f"audio.wav -> {dst.name}")
-        shutil.copyfile(SOURCE_WAV, dst)
+        clone_file(SOURCE_WAV, dst)
 
     print("All copies created successfully.")
 
@@ -4,6 +4,7 @@ import sys
 import time
 import shutil
 import csv
+import multiprocessing
 import tempfile
 from typing import List, Tuple, Optional
 
@@ -129,7 +130,7 @@ def export_sprites_gui(
                     continue
                 out_name = f"{i}_{si}_{bank}.png"
                 out_path = os.path.join(out_dir, out_name)
-                img.save(out_path)
+                img.save(out_path, format="PNG", optimize=False, compress_level=es.PNG_COMPRESS_LEVEL)
                 done_steps += 1
                 if progress_cb and total_steps > 0:
                     progress_cb(done_steps / total_steps, f"Exported {out_name}")
@@ -4692,4 +4693,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # A frozen worker process must exit here instead of opening another window.
+    multiprocessing.freeze_support()
     main()
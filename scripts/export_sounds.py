@@ -164,18 +164,19 @@ def load_decoder():
     return decfunc
 
 
-def decode_one(decfunc, in_path: str, out_path: str) -> int:
+def encode_dll_path(path: str) -> bytes:
+    return path.encode("ascii", errors="replace")
+
+
+def decode_one(decfunc, in_path, out_path) -> int:
+    # Paths may be passed pre-encoded so the per-chunk loop does not re-encode them.
+    in_c = encode_dll_path(in_path) if isinstance(in_path, str) else in_path
+    out_c = encode_dll_path(out_path) if isinstance(out_path, str) else out_path
     try:
-        return int(decfunc(
-            in_path.encode("ascii", errors="replace"),
-            out_path.encode("ascii", errors="replace"),
-        ))
+        return int(decfunc(in_c, out_c))
     except TypeError:
         try:
-            return int(decfunc(
-                infile=in_path.encode("ascii", errors="replace"),
-                outfile=out_path.encode("ascii", errors="replace"),
-            ))
+            return int(decfunc(infile=in_c, outfile=out_c))
         except Exception:
             return 0
     except Exception:
@@ -302,21 +303,26 @@ def scan_u32_audio(data: bytes) -> List[AudioCandidate]:
     n = len(data)
 
     while i < n - 8:
-        if data[i + 4:i + 6] == b"\x80\x3E":
-            info = best_u32_audio_blob(data, i)
-            if info is not None:
-                blob, declared, variant = info
-                out.append(AudioCandidate(
-                    absolute_offset=i,
-                    blob=blob,
-                    source="raw_u32_scan",
-                    declared_len=declared,
-                    stored_size=len(blob),
-                    payload_size=max(0, len(blob) - 2),
-                    size_variant=variant,
-                ))
-                i += max(4, min(len(blob) // 8, 0x1000))
-                continue
+        # Jump straight to the next 0x80 0x3E marker instead of testing every byte.
+        j = data.find(b"\x80\x3E", i + 4)
+        if j == -1 or j - 4 >= n - 8:
+            break
+        i = j - 4
+
+        info = best_u32_audio_blob(data, i)
+        if info is not None:
+            blob, declared, variant = info
+            out.append(AudioCandidate(
+                absolute_offset=i,
+                blob=blob,
+                source="raw_u32_scan",
+                declared_len=declared,
+                stored_size=len(blob),
+                payload_size=max(0, len(blob) - 2),
+                size_variant=variant,
+            ))
+            i += max(4, min(len(blob) // 8, 0x1000))
+            continue
         i += 1
 
     return out
@@ -342,7 +348,8 @@ def scan_u16_audio(data: bytes) -> List[AudioCandidate]:
                 payload_size=max(0, len(blob) - 2),
                 size_variant=variant,
             ))
-        pos = idx + 1
+        # The marker cannot overlap itself, so skip past the whole hit.
+        pos = idx + len(A18_MARKER)
     return out
 
 
@@ -594,7 +601,14 @@ def write_chunk_file(chunks_dir: str, idx: int, cand: AudioCandidate) -> str:
     return fname
 
 
-def try_decode_candidate_variants(decfunc, temp_dir: str, wav_out: str, cand: AudioCandidate) -> Tuple[bool, int, float, str]:
+def try_decode_candidate_variants(
+    decfunc,
+    temp_dir: str,
+    wav_out: str,
+    cand: AudioCandidate,
+    wav_out_c: Optional[bytes] = None,
+    tmp_paths: Optional[List[Tuple[str, bytes]]] = None,
+) -> Tuple[bool, int, float, str]:
     variants = [(cand.blob, cand.size_variant or "as_is")]
 
     ok, declared = is_probable_audio_u32_at(cand.blob, 0)
@@ -610,8 +624,15 @@ def try_decode_candidate_variants(decfunc, temp_dir: str, wav_out: str, cand: Au
             seen_sizes.add(len(blob2))
             variants.append((blob2, f"retry_u32+{delta}"))
 
+    if wav_out_c is None:
+        wav_out_c = encode_dll_path(wav_out)
+
     for vi, (blob, tag) in enumerate(variants):
-        tmp_a18 = os.path.join(temp_dir, f"decode_try_{vi:02d}.a18")
+        if tmp_paths is not None and vi < len(tmp_paths):
+            tmp_a18, tmp_a18_c = tmp_paths[vi]
+        else:
+            tmp_a18 = os.path.join(temp_dir, f"decode_try_{vi:02d}.a18")
+            tmp_a18_c = encode_dll_path(tmp_a18)
         with open(tmp_a18, "wb") as f:
             f.write(blob)
 
@@ -621,7 +642,7 @@ def try_decode_candidate_variants(decfunc, temp_dir: str, wav_out: str, cand: Au
             except Exception:
                 pass
 
-        ret = decode_one(decfunc, tmp_a18, wav_out)
+        ret = decode_one(decfunc, tmp_a18_c, wav_out_c)
         if ret and os.path.exists(wav_out):
             rate, dur = get_wav_info(wav_out)
             if rate > 0 and dur > 0:
@@ -741,17 +762,26 @@ def main():
     temp_decode_dir = os.path.join(out_base, "_decode_tmp")
     os.makedirs(temp_decode_dir, exist_ok=True)
 
+    # Encode every DLL path once up front instead of once per decode attempt.
+    tmp_paths = []
+    for vi in range(1 + len(AUDIO_TOTAL_DELTA_CANDIDATES)):
+        tmp_a18 = os.path.join(temp_decode_dir, f"decode_try_{vi:02d}.a18")
+        tmp_paths.append((tmp_a18, encode_dll_path(tmp_a18)))
+    wav_paths = [os.path.join(out_base, row["wav_file"]) for row in manifest_rows]
+    wav_paths_c = [encode_dll_path(p) for p in wav_paths]
+
     decoded_ok = 0
-    for row in manifest_rows:
+    for row, wav_path, wav_path_c in zip(manifest_rows, wav_paths, wav_paths_c):
         idx = row["chunk_index"]
         cand = candidates[idx]
-        wav_path = os.path.join(out_base, row["wav_file"])
 
         ok, rate, dur, retry_tag = try_decode_candidate_variants(
             decfunc=decfunc,
             temp_dir=temp_decode_dir,
             wav_out=wav_path,
             cand=cand,
+            wav_out_c=wav_path_c,
+            tmp_paths=tmp_paths,
         )
 
         if ok:
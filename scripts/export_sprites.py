@@ -8,11 +8,13 @@ Drop-in compatible with your existing digimon_tool_gui.py because it keeps:
 
 Speedups vs the old exporter:
 - Optional package-offset shortcut for CLI.
-- Faster package scan when no offset is provided.
+- Faster package scan when no offset is provided; the found offset is remembered in <bin>.pkgoff.
 - Sprite dimensions/bpp/palette bank are precomputed in SpriteDef.
 - Palette RGBA conversion is cached instead of rebuilt for every image/bank.
 - Character decode uses safe lookup tables for 2bpp/4bpp/8bpp and safe generic decode for 6bpp.
 - Tile RGBA creation uses NumPy palette indexing when available, with a safe Python fallback.
+- Subimage composition blits sprites into one NumPy canvas instead of chaining PIL alpha_composite calls.
+- When Numba is installed, the palette lookup + flip + blit runs as one parallel compiled kernel.
 
 Correctness/safety choices:
 - Keeps the original MSB-first bit order.
@@ -22,6 +24,7 @@ Correctness/safety choices:
 
 import argparse
 import io
+import mmap
 import os
 import random
 import struct
@@ -36,6 +39,11 @@ try:
 except Exception:
     np = None
 
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+
 # ------------------ low-level utils ------------------
 
 def le16(b, off): return struct.unpack_from("<H", b, off)[0]
@@ -102,13 +110,14 @@ def sprite_details(attr: int) -> Tuple[int, int, int, int, int]:
 
 # ------------------ package parsing ------------------
 
-def parse_package(block: bytes) -> Tuple[int, int, int, int, List[ImageDef], List[SpriteDef], List[int]]:
-    img_defs_offset = le32(block, 0)
-    spr_defs_offset = le32(block, 4)
-    palettes_offset = le32(block, 8)
-    chars_offset    = le32(block, 12)
+def parse_package(buf: bytes, base_off: int = 0) -> Tuple[int, int, int, int, List[ImageDef], List[SpriteDef], List[int]]:
+    """Parse the package starting at buf[base_off]; returned offsets are package-relative."""
+    img_defs_offset = le32(buf, base_off + 0)
+    spr_defs_offset = le32(buf, base_off + 4)
+    palettes_offset = le32(buf, base_off + 8)
+    chars_offset    = le32(buf, base_off + 12)
 
-    assert 0 < img_defs_offset < spr_defs_offset < palettes_offset < chars_offset <= len(block), "Bad package offsets"
+    assert 0 < img_defs_offset < spr_defs_offset < palettes_offset < chars_offset <= len(buf) - base_off, "Bad package offsets"
 
     img_len = spr_defs_offset - img_defs_offset
     spr_len = palettes_offset - spr_defs_offset
@@ -121,17 +130,18 @@ def parse_package(block: bytes) -> Tuple[int, int, int, int, List[ImageDef], Lis
 
     images: List[ImageDef] = []
     for i in range(num_images):
-        o = img_defs_offset + i * 6
-        images.append(ImageDef(le16(block, o), block[o + 2], block[o + 3], le16(block, o + 4)))
+        o = base_off + img_defs_offset + i * 6
+        images.append(ImageDef(le16(buf, o), buf[o + 2], buf[o + 3], le16(buf, o + 4)))
 
     sprites: List[SpriteDef] = []
     for i in range(num_sprites):
-        o = spr_defs_offset + i * 8
-        attr = le16(block, o + 6)
+        o = base_off + spr_defs_offset + i * 8
+        attr = le16(buf, o + 6)
         w, h, bpp, sp_palette, sp_flip = sprite_details(attr)
-        sprites.append(SpriteDef(le16(block, o), se16(block, o + 2), se16(block, o + 4), attr, w, h, bpp, sp_palette, sp_flip))
+        sprites.append(SpriteDef(le16(buf, o), se16(buf, o + 2), se16(buf, o + 4), attr, w, h, bpp, sp_palette, sp_flip))
 
-    palette_words = [le16(block, palettes_offset + 2 * i) for i in range(num_colors)]
+    pal_base = base_off + palettes_offset
+    palette_words = [le16(buf, pal_base + 2 * i) for i in range(num_colors)]
     return img_defs_offset, spr_defs_offset, palettes_offset, chars_offset, images, sprites, palette_words
 
 def _validate_candidate(bin_data: bytes, off: int):
@@ -152,8 +162,8 @@ def _validate_candidate(bin_data: bytes, off: int):
     num_colors  = pal_len // 2
     if num_images < 500 or num_images > 10000 or num_colors < 64:
         return None
-    block = bin_data[off: off + chars + 1_000_000]
-    parsed = parse_package(block)
+    # Parse in place; slicing a block here copied up to chars + 1 MB per candidate.
+    parsed = parse_package(bin_data, off)
     if parsed[4] and parsed[4][-1].sprite_start_index < num_sprites:
         return parsed
     return None
@@ -182,11 +192,34 @@ def scan_for_package(bin_data: bytes) -> Tuple[int, Tuple]:
             continue
     raise RuntimeError("No sprites package found")
 
+# Sidecar "<bin>.pkgoff" holding "<offset> <size> <mtime_ns>" from the last successful scan.
+def _pkgoff_path(bin_path: str) -> str:
+    return bin_path + ".pkgoff"
+
+def load_cached_package_offset(bin_path: str) -> Optional[int]:
+    try:
+        with open(_pkgoff_path(bin_path), "r", encoding="ascii") as f:
+            off_s, size_s, mtime_s = f.read().split()
+        st = os.stat(bin_path)
+        if int(size_s) != st.st_size or int(mtime_s) != st.st_mtime_ns:
+            return None
+        return int(off_s, 16)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_package_offset(bin_path: str, package_offset: int):
+    try:
+        st = os.stat(bin_path)
+        with open(_pkgoff_path(bin_path), "w", encoding="ascii") as f:
+            f.write(f"0x{package_offset:X} {st.st_size} {st.st_mtime_ns}\n")
+    except OSError:
+        pass
+
 def parse_package_at(bin_data: bytes, package_offset: int) -> Tuple[int, Tuple, bytes]:
     parsed = _validate_candidate(bin_data, package_offset)
     if parsed is None:
         raise RuntimeError(f"No valid sprites package found at 0x{package_offset:X}")
-    block = bin_data[package_offset:]
+    block = memoryview(bin_data)[package_offset:]
     return package_offset, parsed, block
 
 # ------------------ decode caches ------------------
@@ -320,16 +353,45 @@ def _choose_alpha_mode(palette_words, idef, first_sprite, alpha_mode, palette_st
     _AUTO_MODE_CACHE[key] = mode
     return mode
 
+def _sprite_rgba_np(vals, pal_offset, w, h, palette_np):
+    # Clip is a safety guard against malformed data. Valid values should already be in range.
+    idxs = np.asarray(vals, dtype=np.int64) + pal_offset
+    max_idx = len(palette_np) - 1
+    if idxs.size != w * h:
+        idxs = np.resize(idxs, w * h)
+    idxs = np.clip(idxs, 0, max_idx)
+    return palette_np[idxs].reshape((h, w, 4))
+
+_compose_kernel = None
+if njit is not None and np is not None:
+    @njit(cache=True, parallel=True)
+    def _compose_kernel(canvas, vals, val_starts, xs, ys, ws, hs, flips, pal_offsets, palette_np):
+        # Rows are independent; sprites are walked in order per row so later sprites still win overlaps.
+        n = xs.shape[0]
+        max_idx = palette_np.shape[0] - 1
+        for y in prange(canvas.shape[0]):
+            for i in range(n):
+                sy = y - ys[i]
+                if sy < 0 or sy >= hs[i]:
+                    continue
+                w = ws[i]
+                row = hs[i] - 1 - sy if flips[i] & 2 else sy
+                base = val_starts[i] + row * w
+                for sx in range(w):
+                    col = w - 1 - sx if flips[i] & 1 else sx
+                    idx = vals[base + col] + pal_offsets[i]
+                    if idx < 0:
+                        idx = 0
+                    elif idx > max_idx:
+                        idx = max_idx
+                    if palette_np[idx, 3] > 0:
+                        x = xs[i] + sx
+                        for c in range(4):
+                            canvas[y, x, c] = palette_np[idx, c]
+
 def _make_sprite_image(vals, pal_offset, colors, w, h, palette_rgba, palette_np):
     if np is not None and hasattr(vals, "shape") and palette_np is not None:
-        # Clip is a safety guard against malformed data. Valid values should already be in range.
-        idxs = np.asarray(vals, dtype=np.int64) + pal_offset
-        max_idx = len(palette_np) - 1
-        if idxs.size != w * h:
-            idxs = np.resize(idxs, w * h)
-        idxs = np.clip(idxs, 0, max_idx)
-        arr = palette_np[idxs].reshape((h, w, 4))
-        return Image.fromarray(arr, "RGBA")
+        return Image.fromarray(_sprite_rgba_np(vals, pal_offset, w, h, palette_np), "RGBA")
 
     out = []
     append = out.append
@@ -383,6 +445,65 @@ def compose_subimage(block: bytes,
     palette_np = get_palette_np(palette_words, pal_mode)
     base_index = idef.palette_start_index * 4
 
+    if palette_np is not None and _compose_kernel is not None:
+        n = len(sprs)
+        val_parts = []
+        val_starts = np.empty(n, dtype=np.int64)
+        xs = np.empty(n, dtype=np.int64)
+        ys = np.empty(n, dtype=np.int64)
+        ws = np.empty(n, dtype=np.int64)
+        hs = np.empty(n, dtype=np.int64)
+        flips = np.empty(n, dtype=np.int64)
+        pal_offsets = np.empty(n, dtype=np.int64)
+        pos = 0
+        for i, s in enumerate(sprs):
+            vals = decode_character_values(block, chars_offset, s.charnum, s.w, s.h, s.bpp)
+            colors = 1 << s.bpp
+            step = colors if palette_step_mode == "colors" else 4
+            bank_idx = s.sp_palette if use_attr_palette else bank
+            pal_offset = base_index + bank_idx * step
+            if pal_offset + colors > len(palette_rgba):
+                pal_offset = base_index
+
+            val_parts.append(np.asarray(vals, dtype=np.int64))
+            val_starts[i] = pos
+            pos += s.w * s.h
+            xs[i] = s.ox - min_x
+            ys[i] = s.oy - min_y
+            ws[i] = s.w
+            hs[i] = s.h
+            flips[i] = s.sp_flip
+            pal_offsets[i] = pal_offset
+
+        canvas = np.zeros((H, W, 4), dtype=np.uint8)
+        _compose_kernel(canvas, np.concatenate(val_parts), val_starts, xs, ys, ws, hs, flips, pal_offsets, palette_np)
+        return Image.fromarray(canvas, "RGBA")
+
+    if palette_np is not None:
+        # ARGB1555 alpha is always 0 or 255, so alpha_composite reduces to a masked copy.
+        canvas = np.zeros((H, W, 4), dtype=np.uint8)
+        for s in sprs:
+            vals = decode_character_values(block, chars_offset, s.charnum, s.w, s.h, s.bpp)
+            colors = 1 << s.bpp
+            step = colors if palette_step_mode == "colors" else 4
+            bank_idx = s.sp_palette if use_attr_palette else bank
+            pal_offset = base_index + bank_idx * step
+            if pal_offset + colors > len(palette_rgba):
+                pal_offset = base_index
+
+            spr = _sprite_rgba_np(vals, pal_offset, s.w, s.h, palette_np)
+            if s.sp_flip & 1:
+                spr = spr[:, ::-1]
+            if s.sp_flip & 2:
+                spr = spr[::-1]
+
+            x0 = s.ox - min_x
+            y0 = s.oy - min_y
+            dst = canvas[y0:y0 + s.h, x0:x0 + s.w]
+            mask = spr[..., 3] > 0
+            dst[mask] = spr[mask]
+        return Image.fromarray(canvas, "RGBA")
+
     img = Image.new("RGBA", (W, H), (0, 0, 0, 0))
 
     for s in sprs:
@@ -407,6 +528,9 @@ def compose_subimage(block: bytes,
 
 # ------------------ helpers for CLI/export loop ------------------
 
+# zlib level 1 is several times faster than Pillow's default (6) for ~15% larger PNGs.
+PNG_COMPRESS_LEVEL = 1
+
 def parse_banks(banks: str) -> List[int]:
     banks = banks.strip()
     if "-" in banks:
@@ -423,14 +547,28 @@ def export_range(bin_path: str,
                  palette_step: str = "colors",
                  use_attr_palette: bool = False,
                  package_offset: Optional[int] = None,
-                 progress_cb=None):
+                 progress_cb=None,
+                 png_compress_level: int = PNG_COMPRESS_LEVEL):
     os.makedirs(out_dir, exist_ok=True)
+    # Map the dump read-only instead of copying it onto the heap; pages load on access.
     with open(bin_path, "rb") as f:
-        data = f.read()
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
+    cached = None
     if package_offset is None:
+        cached_off = load_cached_package_offset(bin_path)
+        if cached_off is not None:
+            try:
+                cached = parse_package_at(data, cached_off)
+            except Exception:
+                cached = None
+
+    if cached is not None:
+        pkg_off, parsed, block = cached
+    elif package_offset is None:
         pkg_off, parsed = scan_for_package(data)
-        block = data[pkg_off:]
+        block = memoryview(data)[pkg_off:]
+        save_cached_package_offset(bin_path, pkg_off)
     else:
         pkg_off, parsed, block = parse_package_at(data, package_offset)
 
@@ -466,7 +604,8 @@ def export_range(bin_path: str,
         if img is None:
             continue
         out_name = f"{i}_{si}_{bank}.png"
-        img.save(os.path.join(out_dir, out_name), optimize=False)
+        img.save(os.path.join(out_dir, out_name), format="PNG", optimize=False, compress_level=png_compress_level)
+        img = None
         if progress_cb:
             progress_cb(n / total if total else 1.0, f"Exported {out_name}")
 
@@ -485,6 +624,8 @@ def main():
     ap.add_argument("--palette-step", choices=["colors", "4"], default="colors", help="Palette step per bank")
     ap.add_argument("--use-attr-palette", action="store_true", help="Use Attribute0 sp_palette instead of uniform bank override")
     ap.add_argument("--package-offset", default=None, help="Optional package base, e.g. 0x1EF000 or 0x196000")
+    ap.add_argument("--png-compress-level", type=int, choices=range(0, 10), default=PNG_COMPRESS_LEVEL,
+                    metavar="0-9", help="PNG zlib compression level (higher = smaller, slower)")
     ap.add_argument("--validate-zip", default=None, help="Optional reference sprites zip to sample-compare")
     ap.add_argument("--sample", type=int, default=50, help="Validation sample size")
     args = ap.parse_args()
@@ -504,6 +645,7 @@ def main():
         palette_step=args.palette_step,
         use_attr_palette=args.use_attr_palette,
         package_offset=package_offset,
+        png_compress_level=args.png_compress_level,
     )
     print(f"[DONE] Exported {count} sprite image(s). Package offset: 0x{pkg_off:X}. Output: {args.out}")
 
@@ -21,6 +21,7 @@ TEXT_ARCHIVE_PATHS = [
 ]
 
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*=,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 
 # --------------------------------------------------
 # LE helpers
@@ -182,7 +183,7 @@ def main():
         name = r["name"]
 
         # forbidden chars
-        if any(c in FORBIDDEN_CHARS for c in name):
+        if FORBIDDEN_RE.search(name):
             base_name = baseline.get(si)
 
             # Only report if user actually changed the name
@@ -25,12 +25,29 @@ import os
 import csv
 import wave
 import argparse
+from fractions import Fraction
 import numpy as np
 
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+try:
+    from scipy.signal import resample_poly
+except Exception:
+    resample_poly = None
+
 
 SPF2_DATA_OFFSET = 0x40
 MAX_SAMPLE_RATE = 192000
 
+GP_ADPCM_STEP_TABLE = np.array([
+    16, 17, 19, 21, 23, 25, 28, 31,
+    34, 37, 41, 45, 50, 55, 60, 66
+], dtype=np.int32)
+GP_ADPCM_MAX_AMP = 2047
+
 
 def u32le(buf: bytes, off: int) -> int:
     return int.from_bytes(buf[off:off + 4], "little")
@@ -81,11 +98,17 @@ def convert_wav_to_mono_16bit_resampled(
         new_len = int(round(duration * target_rate))
         if new_len <= 0:
             raise ValueError(f"Resampled length <= 0 for {in_path}")
-        pcm = np.interp(
-            np.linspace(0, len(pcm), new_len, endpoint=False),
-            np.arange(len(pcm)),
-            pcm.astype(np.float32),
-        ).astype(np.int16)
+        if resample_poly is not None:
+            # Polyphase FIR: anti-aliased and faster than building an interp index grid.
+            ratio = Fraction(target_rate, sr).limit_denominator(1000)
+            pcm = resample_poly(pcm.astype(np.float32), ratio.numerator, ratio.denominator)
+            pcm = np.clip(pcm, -32768, 32767).astype(np.int16)
+        else:
+            pcm = np.interp(
+                np.linspace(0, len(pcm), new_len, endpoint=False),
+                np.arange(len(pcm)),
+                pcm.astype(np.float32),
+            ).astype(np.int16)
 
     fpcm = pcm.astype(np.float32)
 
@@ -109,34 +132,12 @@ def convert_wav_to_mono_16bit_resampled(
     return fpcm.astype(np.int16)
 
 
-def gp_adpcm_encode(
-    pcm16,
-    initial_predictor: int = 0,
-    initial_step_index: int = 0,
-):
-    """
-    Encode int16 PCM into GP-style ADPCM bytes.
-
-    Matches export_device_sounds_bestlisten.py assumptions:
-        - low nibble then high nibble
-        - predictor = 0
-        - step_index = 0
-    """
-    step_table = [
-        16, 17, 19, 21, 23, 25, 28, 31,
-        34, 37, 41, 45, 50, 55, 60, 66
-    ]
-    max_amp = 2047
-
-    predictor = int(initial_predictor)
-    step_index = int(initial_step_index)
-
-    pcm_q = np.clip((pcm16.astype(np.int32) // 16), -max_amp, max_amp).astype(np.int32)
-
-    nibbles = []
+def _gp_adpcm_encode_core(pcm_q, step_table, predictor, step_index, max_amp):
+    # One pass: quantize each sample to a nibble and pack pairs (low then high) as we go.
+    out = np.zeros((len(pcm_q) + 1) // 2, dtype=np.uint8)
 
-    for sample in pcm_q:
-        diff = int(sample) - predictor
+    for i in range(len(pcm_q)):
+        diff = pcm_q[i] - predictor
         nib = 0
 
         if diff < 0:
@@ -165,20 +166,55 @@ def gp_adpcm_encode(
         else:
             predictor += contrib
 
-        predictor = max(-max_amp, min(max_amp, predictor))
+        if predictor < -max_amp:
+            predictor = -max_amp
+        elif predictor > max_amp:
+            predictor = max_amp
 
         step_index += (nib & 0x7) - 4
-        step_index = max(0, min(15, step_index))
+        if step_index < 0:
+            step_index = 0
+        elif step_index > 15:
+            step_index = 15
+
+        if i & 1:
+            out[i >> 1] |= (nib & 0xF) << 4
+        else:
+            out[i >> 1] = nib & 0xF
+
+    return out
 
-        nibbles.append(nib & 0xF)
 
-    out_bytes = bytearray()
-    for i in range(0, len(nibbles), 2):
-        lo = nibbles[i]
-        hi = nibbles[i + 1] if i + 1 < len(nibbles) else 0
-        out_bytes.append((lo & 0xF) | ((hi & 0xF) << 4))  # low then high
+if njit is not None:
+    _gp_adpcm_encode_core = njit(cache=True)(_gp_adpcm_encode_core)
 
-    return bytes(out_bytes)
+
+def gp_adpcm_encode(
+    pcm16,
+    initial_predictor: int = 0,
+    initial_step_index: int = 0,
+):
+    """
+    Encode int16 PCM into GP-style ADPCM bytes.
+
+    Matches export_device_sounds_bestlisten.py assumptions:
+        - low nibble then high nibble
+        - predictor = 0
+        - step_index = 0
+
+    The per-sample loop is compiled with Numba when it is installed.
+    """
+    max_amp = GP_ADPCM_MAX_AMP
+    pcm_q = np.clip((pcm16.astype(np.int32) // 16), -max_amp, max_amp).astype(np.int32)
+
+    out = _gp_adpcm_encode_core(
+        pcm_q,
+        GP_ADPCM_STEP_TABLE,
+        int(initial_predictor),
+        int(initial_step_index),
+        max_amp,
+    )
+    return out.tobytes()
 
 
 def import_device_sounds(
@@ -23,6 +23,7 @@ TEXT_ARCHIVE_PATHS = [
 BASELINE_NAMES_CSV = "digivice_names_original.csv"
 
 FORBIDDEN_CHARS = set("+-:<>?!~`'\"[]{}\\|@#$%^&*=,")
+FORBIDDEN_RE = re.compile("[" + re.escape("".join(sorted(FORBIDDEN_CHARS))) + "]")
 
 
 def le16(b, o):
@@ -195,7 +196,7 @@ def main():
 
         name = str(r.get("name", ""))
 
-        if any(c in FORBIDDEN_CHARS for c in name):
+        if FORBIDDEN_RE.search(name):
             base_name = baseline.get(si)
             if base_name is None or name != base_name:
                 skipped_forbidden.append(si)
@@ -13,16 +13,24 @@ Usage:
 import os
 import re
 import csv
+import mmap
+import hashlib
 import wave
 import ctypes
 import shutil
 import argparse
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional, Set
 from ctypes.wintypes import LPCSTR
 import numpy as np
 
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
 
 PACK_BASE = 0x140000
 A18_MARKER = b"\x00\x00\x80\x3E"
@@ -247,39 +255,54 @@ def parse_tolerant_pack(data: bytes, base: int) -> Optional[List[PackEntry]]:
     return best_entries
 
 
-def scan_u32_audio(data: bytes) -> List[AudioCandidate]:
+def find_a18_marker_tails(data: bytes) -> np.ndarray:
+    """Offsets of every b"\\x80\\x3E" pair, found in one vectorized pass over the BIN."""
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if len(arr) < 2:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero((arr[:-1] == 0x80) & (arr[1:] == 0x3E))
+
+
+def scan_u32_audio(data: bytes, tails: Optional[np.ndarray] = None) -> List[AudioCandidate]:
     out = []
-    i = 0
     n = len(data)
-
-    while i < n - 8:
-        if data[i + 4:i + 6] == b"\x80\x3E":
-            info = best_u32_audio_blob(data, i)
-            if info is not None:
-                blob, declared, variant = info
-                out.append(AudioCandidate(
-                    absolute_offset=i,
-                    blob=blob,
-                    source="raw_u32_scan",
-                    declared_len=declared,
-                    stored_size=len(blob),
-                    payload_size=max(0, len(blob) - 2),
-                    size_variant=variant,
-                ))
-                i += max(4, min(len(blob) // 8, 0x1000))
-                continue
-        i += 1
+    if tails is None:
+        tails = find_a18_marker_tails(data)
+
+    # A u32 header can only start 4 bytes before a marker tail; after a hit, skip ahead as before.
+    next_i = 0
+    for t in tails.tolist():
+        i = t - 4
+        if i < next_i:
+            continue
+        if i >= n - 8:
+            break
+        info = best_u32_audio_blob(data, i)
+        if info is not None:
+            blob, declared, variant = info
+            out.append(AudioCandidate(
+                absolute_offset=i,
+                blob=blob,
+                source="raw_u32_scan",
+                declared_len=declared,
+                stored_size=len(blob),
+                payload_size=max(0, len(blob) - 2),
+                size_variant=variant,
+            ))
+            next_i = i + max(4, min(len(blob) // 8, 0x1000))
 
     return out
 
 
-def scan_u16_audio(data: bytes) -> List[AudioCandidate]:
+def scan_u16_audio(data: bytes, tails: Optional[np.ndarray] = None) -> List[AudioCandidate]:
     out = []
-    pos = 0
-    while True:
-        idx = data.find(A18_MARKER, pos)
-        if idx == -1:
-            break
+    if tails is None:
+        tails = find_a18_marker_tails(data)
+
+    for t in tails.tolist():
+        idx = t - 2
+        if idx < 0 or data[idx] != 0 or data[idx + 1] != 0:
+            continue
         start = idx - 2
         info = best_u16_audio_blob(data, start)
         if info is not None:
@@ -293,7 +316,6 @@ def scan_u16_audio(data: bytes) -> List[AudioCandidate]:
                 payload_size=max(0, len(blob) - 2),
                 size_variant=variant,
             ))
-        pos = idx + 1
     return out
 
 
@@ -460,9 +482,49 @@ def merge_candidates(cands: List[AudioCandidate]) -> List[AudioCandidate]:
     return sorted(by_off.values(), key=lambda x: x.absolute_offset)
 
 
-def discover_audio_candidates(bin_path: str) -> Tuple[bytearray, List[AudioCandidate], Dict[str, int]]:
-    with open(bin_path, "rb") as f:
-        data = bytearray(f.read())
+def load_bin(path: str) -> mmap.mmap:
+    # Copy-on-write map: pages are read on demand and patches stay private until saved.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def merge_patches(patches: List[Tuple[int, bytes]]):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs = []
+    for k in sorted(range(len(patches)), key=lambda k: patches[k][0]):
+        off, blob = patches[k]
+        end = off + len(blob)
+        if runs and off <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off, end, [k]])
+    for start, end, members in runs:
+        run = bytearray(end - start)
+        for k in sorted(members):
+            off, blob = patches[k]
+            run[off-start:off-start+len(blob)] = blob
+        yield start, run
+
+
+def save_patches(src_path: str, out_path: str, patches: List[Tuple[int, bytes]]):
+    # Only the patched runs hit the disk; a separate output_bin starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path, out_path)):
+        shutil.copyfile(src_path, out_path)
+    fd = os.open(out_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+    try:
+        for start, run in merge_patches(patches):
+            if hasattr(os, "pwrite"):
+                os.pwrite(fd, run, start)
+            else:
+                os.lseek(fd, start, os.SEEK_SET)
+                os.write(fd, run)
+    finally:
+        os.close(fd)
+
+
+def discover_audio_candidates(bin_path: str) -> Tuple[mmap.mmap, List[AudioCandidate], Dict[str, int]]:
+    data = load_bin(bin_path)
 
     print(f"[*] Loaded {bin_path} ({len(data)} bytes)")
     stats = {
@@ -473,13 +535,15 @@ def discover_audio_candidates(bin_path: str) -> Tuple[bytearray, List[AudioCandi
         "merged": 0,
     }
 
+    tails = find_a18_marker_tails(data)
+
     print("[*] Running raw u32 scan...")
-    raw_u32 = scan_u32_audio(data)
+    raw_u32 = scan_u32_audio(data, tails)
     stats["raw_u32"] = len(raw_u32)
     print(f"[*] Audio leaves found by raw u32 scan: {len(raw_u32)}")
 
     print("[*] Running raw u16 scan...")
-    raw_u16 = scan_u16_audio(data)
+    raw_u16 = scan_u16_audio(data, tails)
     stats["raw_u16"] = len(raw_u16)
     print(f"[*] Audio leaves found by raw u16 scan: {len(raw_u16)}")
 
@@ -563,6 +627,42 @@ def load_replace_map(csv_path: str) -> Tuple[Dict[str, str], Dict[int, str]]:
     return name_map, index_map
 
 
+def _normalize_pcm_core(pcm, target_rms, peak_limit):
+    # RMS gain + peak limit + clip fused into two passes over the samples.
+    n = pcm.shape[0]
+    out = np.empty(n, dtype=np.int16)
+    if n == 0:
+        return out
+
+    sumsq = 0.0
+    peak_in = 0.0
+    for i in range(n):
+        v = float(pcm[i])
+        sumsq += v * v
+        a = abs(v)
+        if a > peak_in:
+            peak_in = a
+
+    rms = np.sqrt(sumsq / n)
+    gain = target_rms / rms if rms > 0 else 1.0
+    peak = peak_in * gain
+    if peak > 0 and peak > peak_limit:
+        gain *= peak_limit / peak
+
+    for i in range(n):
+        v = pcm[i] * gain
+        if v > 32767.0:
+            v = 32767.0
+        elif v < -32768.0:
+            v = -32768.0
+        out[i] = int(v)
+    return out
+
+
+# Only worth it compiled; the NumPy passes below are the fallback.
+_normalize_pcm_kernel = njit(cache=True, fastmath=True, nogil=True)(_normalize_pcm_core) if njit is not None else None
+
+
 def convert_wav_to_mono_16bit_16000(
     in_path: str,
     out_path: str,
@@ -594,31 +694,40 @@ def convert_wav_to_mono_16bit_16000(
         new_length = int(duration * 16000)
         if new_length <= 0:
             new_length = 1
-        pcm = np.interp(
-            np.linspace(0, len(pcm), new_length, endpoint=False),
-            np.arange(len(pcm)),
-            pcm
-        ).astype(np.int16)
-
-    fpcm = pcm.astype(np.float32)
-
-    rms = float(np.sqrt(np.mean(fpcm ** 2))) if len(fpcm) else 0.0
-    if rms > 0:
-        target_rms = (10.0 ** (target_rms_db / 20.0)) * 32767.0
-        gain = target_rms / rms
+        # 16.16 fixed-point source phase on the len(pcm)/new_length grid, exact per
+        # sample (no accumulated drift); linear interpolation in float32.
+        q, r = divmod(len(pcm) << 16, new_length)
+        k = np.arange(new_length, dtype=np.int64)
+        pos = k * q + (k * r) // new_length
+        last = len(pcm) - 1
+        idx = np.minimum(pos >> 16, last)
+        nxt = np.minimum(idx + 1, last)
+        frac = (pos & 0xFFFF).astype(np.float32) * np.float32(1.0 / 65536.0)
+        cur = pcm[idx].astype(np.float32)
+        pcm = (cur + frac * (pcm[nxt].astype(np.float32) - cur)).astype(np.int16)
+
+    target_rms = (10.0 ** (target_rms_db / 20.0)) * 32767.0
+    peak_limit = limit_ceiling * 32767.0
+
+    if _normalize_pcm_kernel is not None:
+        pcm_out = _normalize_pcm_kernel(np.ascontiguousarray(pcm, dtype=np.int16), target_rms, peak_limit)
     else:
-        gain = 1.0
-
-    fpcm *= gain
+        fpcm = pcm.astype(np.float32)
 
-    peak = float(np.max(np.abs(fpcm))) if len(fpcm) else 0.0
-    if peak > 0:
-        peak_limit = limit_ceiling * 32767.0
-        if peak > peak_limit:
-            fpcm *= (peak_limit / peak)
+        # One SDOT for the energy and max/min for the peak: no squared or abs() temporaries.
+        if len(fpcm):
+            rms = (float(np.dot(fpcm, fpcm)) / fpcm.size) ** 0.5
+            peak_in = max(float(fpcm.max()), -float(fpcm.min()))
+        else:
+            rms = peak_in = 0.0
+        gain = target_rms / rms if rms > 0 else 1.0
+        peak = peak_in * gain
+        if peak > 0 and peak > peak_limit:
+            gain *= peak_limit / peak
 
-    fpcm = np.clip(fpcm, -32768, 32767)
-    pcm_out = fpcm.astype(np.int16)
+        fpcm *= gain
+        np.clip(fpcm, -32768, 32767, out=fpcm)
+        pcm_out = fpcm.astype(np.int16)
 
     with wave.open(out_path, "wb") as out:
         out.setnchannels(1)
@@ -629,6 +738,36 @@ def convert_wav_to_mono_16bit_16000(
     return out_path
 
 
+def normalize_wavs_parallel(jobs: Dict[str, str]) -> Dict[str, Optional[Exception]]:
+    """
+    Run convert_wav_to_mono_16bit_16000 for each {in_path: out_path} job across
+    worker threads. Returns in_path -> the exception it raised, or None.
+
+    Threads rather than processes: this runs inside the frozen GUI, where spawned
+    workers would relaunch the executable. File I/O and the NumPy passes release the GIL.
+    """
+    errors: Dict[str, Optional[Exception]] = {}
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        for src, dst in jobs.items():
+            try:
+                convert_wav_to_mono_16bit_16000(src, dst)
+                errors[src] = None
+            except Exception as e:
+                errors[src] = e
+        return errors
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {src: ex.submit(convert_wav_to_mono_16bit_16000, src, dst) for src, dst in jobs.items()}
+        for src, fut in futures.items():
+            try:
+                fut.result()
+                errors[src] = None
+            except Exception as e:
+                errors[src] = e
+    return errors
+
+
 def load_a1800_enc(dll_path: str):
     dll = ctypes.WinDLL(os.path.abspath(dll_path))
     dll.enc.argtypes = [
@@ -642,26 +781,34 @@ def load_a1800_enc(dll_path: str):
     return dll.enc
 
 
+def encode_dll_path(path: str) -> bytes:
+    return os.path.abspath(path).encode("mbcs", errors="replace")
+
+
 def encode_wav_to_a18_via_dll(
     encfunc,
     wav_path: str,
     out_a18_path: str,
     expected_samplerate: int = 16000,
     verbose: bool = False,
+    check_format: bool = True,
 ):
-    with wave.open(wav_path, "rb") as wf:
-        nch = wf.getnchannels()
-        sw = wf.getsampwidth()
-        sr = wf.getframerate()
-
-    if nch != 1 or sw != 2 or sr != expected_samplerate:
-        raise ValueError(
-            f"WAV {wav_path} must be mono, 16-bit, {expected_samplerate} Hz "
-            f"(got channels={nch}, sampwidth={sw}, rate={sr})"
-        )
+    # check_format=False skips re-reading the header of WAVs this script just normalized.
+    if check_format:
+        with wave.open(wav_path, "rb") as wf:
+            nch = wf.getnchannels()
+            sw = wf.getsampwidth()
+            sr = wf.getframerate()
+
+        if nch != 1 or sw != 2 or sr != expected_samplerate:
+            raise ValueError(
+                f"WAV {wav_path} must be mono, 16-bit, {expected_samplerate} Hz "
+                f"(got channels={nch}, sampwidth={sw}, rate={sr})"
+            )
 
-    in_c = LPCSTR(os.path.abspath(wav_path).encode("mbcs", errors="replace"))
-    out_c = LPCSTR(os.path.abspath(out_a18_path).encode("mbcs", errors="replace"))
+    # enc.argtypes declares LPCSTR, so ctypes passes the encoded bytes through directly.
+    in_c = encode_dll_path(wav_path)
+    out_c = encode_dll_path(out_a18_path)
 
     fh = ctypes.c_short(0)
 
@@ -862,7 +1009,11 @@ def reinject_wavs(
     encfunc = load_a1800_enc(chosen_dll)
     print(f"[*] Loaded encoder DLL: {chosen_dll}")
 
-    tmp_dir = tempfile.mkdtemp(prefix="d3_import_tmp_")
+    # Scratch WAV/.a18 files are written once and read straight back; keep them in the user's TMP/TEMP.
+    tmp_dir = tempfile.mkdtemp(prefix="d3_import_tmp_", dir=os.environ.get("TMP") or os.environ.get("TEMP"))
+    # Normalized-WAV digest -> extracted payload; slots sharing a sound hit the DLL once.
+    encoded_cache: Dict[str, Tuple[bytes, int, str]] = {}
+    patches: List[Tuple[int, bytes]] = []
 
     replaced = 0
     trimmed = 0
@@ -893,6 +1044,15 @@ def reinject_wavs(
 
     total_candidates = len(candidates)
 
+    # Normalize every distinct source WAV up front in parallel; the DLL loop below stays serial.
+    norm_jobs: Dict[str, str] = {}
+    for idx in sorted(final_replace):
+        wav_path = os.path.join(wav_dir, final_replace[idx])
+        if wav_path not in norm_jobs and os.path.exists(wav_path):
+            norm_jobs[wav_path] = os.path.join(tmp_dir, f"norm_{len(norm_jobs):04d}.wav")
+    print(f"[*] Normalizing {len(norm_jobs)} unique WAV(s)...")
+    norm_errors = normalize_wavs_parallel(norm_jobs)
+
     for idx in range(total_candidates):
         if idx not in final_replace:
             skipped_no_map += 1
@@ -915,14 +1075,29 @@ def reinject_wavs(
         print(f"\n[+] chunk_{idx:04d}.a18.wav <- {wav_name}")
         print(f"    offset=0x{start:08X}, slot_size={slot_size}, source={cand.source}")
 
-        norm_wav = os.path.join(tmp_dir, f"chunk_{idx:04d}_norm.wav")
+        norm_wav = norm_jobs[wav_path]
         tmp_a18 = os.path.join(tmp_dir, f"chunk_{idx:04d}.a18")
 
         try:
-            convert_wav_to_mono_16bit_16000(wav_path, norm_wav)
-            encode_wav_to_a18_via_dll(encfunc, norm_wav, tmp_a18, verbose=verbose)
-            raw = open(tmp_a18, "rb").read()
-            new_payload, declared_len, enc_fmt = extract_encoded_audio_payload(raw)
+            if norm_errors[wav_path] is not None:
+                raise norm_errors[wav_path]
+            with open(norm_wav, "rb") as f:
+                key = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+            cached = encoded_cache.get(key)
+            if cached is None:
+                encode_wav_to_a18_via_dll(encfunc, norm_wav, tmp_a18, verbose=verbose, check_format=False)
+                # Map the encoder output; only the header and the payload slice are ever copied.
+                with open(tmp_a18, "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        cached = extract_encoded_audio_payload(b"")
+                    else:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw:
+                            cached = extract_encoded_audio_payload(raw)
+                os.unlink(tmp_a18)
+                encoded_cache[key] = cached
+            else:
+                print("    [*] Reusing previously encoded audio")
+            new_payload, declared_len, enc_fmt = cached
 
             original_cap = max(0, slot_size - 6)
             if len(new_payload) > original_cap:
@@ -944,7 +1119,7 @@ def reinject_wavs(
             if dry_run:
                 print(f"    [✓] DRY RUN — would write safely ({enc_fmt}, payload={len(new_payload)})")
             else:
-                data[start:end] = rebuilt
+                patches.append((start, rebuilt))
                 print(f"    [✓] Written safely ({enc_fmt}, payload={len(new_payload)})")
 
             replaced += 1
@@ -955,11 +1130,11 @@ def reinject_wavs(
             continue
 
     print("\n=== STEP 4: WRITE OUTPUT ===")
+    data.close()
     if dry_run:
         print("[*] Dry run enabled; not writing output BIN.")
     else:
-        with open(output_bin, "wb") as f:
-            f.write(data)
+        save_patches(original_bin, output_bin, patches)
         print(f"[✓] Output written -> {output_bin}")
 
     try:
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 import argparse
+import mmap
 import os
 import re
+import shutil
 import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, Tuple, List, Optional
 from PIL import Image
@@ -12,6 +16,11 @@ try:
 except Exception:
     np = None
 
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
 # ---------------- little-endian readers ----------------
 def le16(b, o): return struct.unpack_from("<H", b, o)[0]
 def le32(b, o): return struct.unpack_from("<I", b, o)[0]
@@ -77,6 +86,11 @@ def sprite_dims_bank_nbytes(attr):
     return w, h, bpp, sp_palette, nbytes
 
 # ---------------- parsing ----------------
+# On-disk record layouts of the image and sprite definition tables.
+IMAGE_DEF_DTYPE = np.dtype([("spr_start", "<u2"), ("w", "u1"), ("h", "u1"), ("pal_start", "<u2")]) if np is not None else None
+SPRITE_DEF_DTYPE = np.dtype([("charnum", "<u2"), ("ox", "<i2"), ("oy", "<i2"), ("attr", "<u2")]) if np is not None else None
+
+
 def parse_package(block: bytes, offsets):
     img_defs_offset, spr_defs_offset, palettes_offset, chars_offset = offsets
     img_len = spr_defs_offset - img_defs_offset
@@ -88,6 +102,24 @@ def parse_package(block: bytes, offsets):
     num_sprites = spr_len // 8
     num_colors = pal_len // 2
 
+    if np is not None:
+        # One typed view per table; the dataclasses are filled from whole columns.
+        img_tab = np.frombuffer(block, dtype=IMAGE_DEF_DTYPE, count=num_images, offset=img_defs_offset)
+        images = [ImageDef(*row) for row in img_tab.tolist()]
+
+        spr_tab = np.frombuffer(block, dtype=SPRITE_DEF_DTYPE, count=num_sprites, offset=spr_defs_offset)
+        attr = spr_tab["attr"].astype(np.int64)
+        w = 8 << ((attr >> 4) & 0x3)
+        h = 8 << ((attr >> 6) & 0x3)
+        bpp = (attr & 0x3) * 2 + 2
+        nbytes = (w * h * bpp + 7) // 8
+        sprites = [SpriteDef(*row) for row in zip(
+            spr_tab["charnum"].tolist(), spr_tab["ox"].tolist(), spr_tab["oy"].tolist(), attr.tolist(),
+            w.tolist(), h.tolist(), bpp.tolist(), ((attr >> 8) & 0xF).tolist(), nbytes.tolist())]
+
+        palette_words = np.frombuffer(block, dtype="<u2", count=num_colors, offset=palettes_offset).tolist()
+        return images, sprites, palette_words, chars_offset
+
     images: List[ImageDef] = []
     for i in range(num_images):
         o = img_defs_offset + i * 6
@@ -104,40 +136,118 @@ def parse_package(block: bytes, offsets):
     return images, sprites, palette_words, chars_offset
 
 
-def robust_scan(data: bytes) -> Tuple[int, bytes, Tuple[int, int, int, int]]:
+def header_candidates(data):
+    """Offsets whose 16-byte header passes the ordering, alignment and image-count checks."""
     size = len(data)
+    n = len(range(0, size - 16, 4))
+    if np is None or n <= 0:
+        return range(0, size - 16, 4)
+    # Header words at 4-byte steps are just consecutive u32s; test all of them at once.
+    words = np.frombuffer(data, dtype="<u4", count=size // 4).astype(np.int64)
+    img_defs, spr_defs, palettes, chars = words[0:n], words[1:n+1], words[2:n+2], words[3:n+3]
+    mask = (0 < img_defs) & (img_defs < spr_defs) & (spr_defs < palettes) & (palettes < chars)
+    mask &= chars <= size - 4 * np.arange(n, dtype=np.int64)
+    img_len = spr_defs - img_defs
+    mask &= (img_len % 6 == 0) & ((palettes - spr_defs) % 8 == 0) & ((chars - palettes) % 2 == 0)
+    mask &= (1000 * 6 <= img_len) & (img_len <= 5000 * 6)
+    return (np.flatnonzero(mask) * 4).tolist()
+
+
+def subimage_bounds(sprites, spans, spr_tab=None):
+    """(min_x, min_y, max_x, max_y) over the sprite rectangles of each [start, end) span."""
+    if spr_tab is None or not spans or any(end <= start for start, end in spans):
+        bounds = []
+        for start, end in spans:
+            sprs = sprites[start:end]
+            bounds.append((min(s.ox for s in sprs), min(s.oy for s in sprs),
+                           max(s.ox + s.w for s in sprs), max(s.oy + s.h for s in sprs)))
+        return bounds
+
+    attr = spr_tab["attr"].astype(np.int64)
+    x1 = spr_tab["ox"].astype(np.int64)
+    y1 = spr_tab["oy"].astype(np.int64)
+    x2 = x1 + (8 << ((attr >> 4) & 0x3))
+    y2 = y1 + (8 << ((attr >> 6) & 0x3))
+    # reduceat over interleaved (start, end) pairs: even slots hold the per-span result.
+    # A trailing pad element keeps end == len(sprites) a valid index.
+    cuts = np.asarray(spans, dtype=np.int64).ravel()
+    cols = [
+        np.minimum.reduceat(np.append(x1, 0), cuts)[0::2],
+        np.minimum.reduceat(np.append(y1, 0), cuts)[0::2],
+        np.maximum.reduceat(np.append(x2, 0), cuts)[0::2],
+        np.maximum.reduceat(np.append(y2, 0), cuts)[0::2],
+    ]
+    return list(zip(*(c.tolist() for c in cols)))
+
+
+def _validate_package_at(data, off: int):
+    """(block, offs) when a plausible sprite package header sits at off, else None."""
+    size = len(data)
+    if off < 0 or off + 16 > size:
+        return None
+    img_defs = le32(data, off + 0)
+    spr_defs = le32(data, off + 4)
+    palettes = le32(data, off + 8)
+    chars    = le32(data, off + 12)
+    if not (0 < img_defs < spr_defs < palettes < chars <= size - off):
+        return None
+    img_len = spr_defs - img_defs
+    spr_len = palettes - spr_defs
+    pal_len = chars - palettes
+    if (img_len % 6) or (spr_len % 8) or (pal_len % 2):
+        return None
+    num_images = img_len // 6
+    num_sprites = spr_len // 8
+    if not (1000 <= num_images <= 5000):
+        return None
+    block = data[off: off + chars + 1_000_000]
+    try:
+        images, _sprites, _palette_words, _chars_offset = parse_package(block, (img_defs, spr_defs, palettes, chars))
+    except Exception:
+        return None
+    if images[-1].sprite_start_index >= num_sprites:
+        return None
+    return block, (img_defs, spr_defs, palettes, chars)
+
+def robust_scan(data: bytes) -> Tuple[int, bytes, Tuple[int, int, int, int]]:
     best = None
-    for off in range(0, size - 16, 4):
-        img_defs = le32(data, off + 0)
-        spr_defs = le32(data, off + 4)
-        palettes = le32(data, off + 8)
-        chars    = le32(data, off + 12)
-        if not (0 < img_defs < spr_defs < palettes < chars <= size - off):
-            continue
-        img_len = spr_defs - img_defs
-        spr_len = palettes - spr_defs
-        pal_len = chars - palettes
-        if (img_len % 6) or (spr_len % 8) or (pal_len % 2):
-            continue
-        num_images = img_len // 6
-        num_sprites = spr_len // 8
-        if not (1000 <= num_images <= 5000):
-            continue
-        block = data[off: off + chars + 1_000_000]
-        try:
-            images, _sprites, _palette_words, _chars_offset = parse_package(block, (img_defs, spr_defs, palettes, chars))
-        except Exception:
+    for off in header_candidates(data):
+        result = _validate_package_at(data, off)
+        if result is None:
             continue
-        if images[-1].sprite_start_index >= num_sprites:
-            continue
-        score = chars
+        block, offs = result
+        score = offs[3]
         if best is None or score > best[0]:
-            best = (score, off, block, (img_defs, spr_defs, palettes, chars))
+            best = (score, off, block, offs)
     if not best:
         raise RuntimeError("No sprites package found with robust scan")
     _score, off, block, offs = best
     return off, block, offs
 
+# Sidecar "<bin>.pkgoff" holding "<offset> <size> <mtime_ns>" from the last successful scan,
+# in the same format export_sprites.py reads and writes.
+def _pkgoff_path(bin_path: str) -> str:
+    return bin_path + ".pkgoff"
+
+def load_cached_package_offset(bin_path: str) -> Optional[int]:
+    try:
+        with open(_pkgoff_path(bin_path), "r", encoding="ascii") as f:
+            off_s, size_s, mtime_s = f.read().split()
+        st = os.stat(bin_path)
+        if int(size_s) != st.st_size or int(mtime_s) != st.st_mtime_ns:
+            return None
+        return int(off_s, 16)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_package_offset(bin_path: str, package_offset: int):
+    try:
+        st = os.stat(bin_path)
+        with open(_pkgoff_path(bin_path), "w", encoding="ascii") as f:
+            f.write(f"0x{package_offset:X} {st.st_size} {st.st_mtime_ns}\n")
+    except OSError:
+        pass
+
 # ---------------- exact MSB-first packing ----------------
 def pack_bits_msb_reference(indexes, bpp):
     """Original safe packer behavior, kept as fallback and reference."""
@@ -158,8 +268,35 @@ def pack_bits_msb_reference(indexes, bpp):
     return bytes(out)
 
 
+_pack_msb_kernel = None
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _pack_msb_kernel(idxs, bpp, nbytes):
+        # Same accumulator walk as pack_bits_msb_reference, straight into a sized buffer.
+        out = np.zeros(nbytes, dtype=np.uint8)
+        mask = (1 << bpp) - 1
+        acc = 0
+        accbits = 0
+        o = 0
+        for i in range(idxs.shape[0]):
+            acc = (acc << bpp) | (idxs[i] & mask)
+            accbits += bpp
+            while accbits >= 8:
+                accbits -= 8
+                if o < nbytes:
+                    out[o] = (acc >> accbits) & 0xFF
+                o += 1
+                acc &= (1 << accbits) - 1
+        if accbits > 0 and o < nbytes:
+            out[o] = (acc << (8 - accbits)) & 0xFF
+        return out
+
+
 def pack_bits_msb_fast(indexes, bpp, expected_nbytes=None):
     """Fast paths that are byte-for-byte equivalent to pack_bits_msb_reference."""
+    if _pack_msb_kernel is not None and expected_nbytes is not None:
+        # The kernel zero-fills/truncates to expected_nbytes itself.
+        return _pack_msb_kernel(np.asarray(indexes, dtype=np.uint8).astype(np.int64), bpp, expected_nbytes).tobytes()
     if np is not None:
         arr = np.asarray(indexes, dtype=np.uint8)
         if bpp == 8:
@@ -174,7 +311,10 @@ def pack_bits_msb_fast(indexes, bpp, expected_nbytes=None):
                 arr = np.concatenate([arr, np.zeros(pad, dtype=np.uint8)])
             out = ((arr[0::4] << 6) | (arr[1::4] << 4) | (arr[2::4] << 2) | arr[3::4]).astype(np.uint8).tobytes()
         else:
-            out = pack_bits_msb_reference(indexes, bpp)
+            # 6bpp (or any other width): keep the low bpp bits of each index MSB-first and let
+            # packbits zero-fill the tail, exactly as the reference flushes its accumulator.
+            bits = np.unpackbits(arr[:, None], axis=1)[:, 8 - bpp:]
+            out = np.packbits(bits.ravel()).tobytes()
     else:
         out = pack_bits_msb_reference(indexes, bpp)
 
@@ -184,6 +324,17 @@ def pack_bits_msb_fast(indexes, bpp, expected_nbytes=None):
 
 # ---------------- palette handling ----------------
 def build_palette_rgba_lists(palette_words):
+    if np is not None:
+        # Whole palette at once as (P, 4) uint8 rows; same values as argb1555_normal/inverted.
+        w = np.asarray(palette_words, dtype=np.int32)
+        rgb = (np.stack([(w >> 10) & 0x1F, (w >> 5) & 0x1F, w & 0x1F], axis=-1) * 255) // 31
+        a = (w >> 15) & 1
+        normal = np.empty((len(w), 4), dtype=np.uint8)
+        normal[:, :3] = rgb
+        inverted = normal.copy()
+        normal[:, 3] = a * 255
+        inverted[:, 3] = (a ^ 1) * 255
+        return normal, inverted
     normal = [argb1555_normal(w) for w in palette_words]
     inverted = [argb1555_inverted(w) for w in palette_words]
     return normal, inverted
@@ -197,12 +348,81 @@ def choose_palette_for_image(alpha_mode, pal_normal, pal_inverted, base, sample_
         return pal_inverted
     off = base + sample_bank * step
     off = min(off, max(0, len(pal_normal) - colors))
-    norm_alpha = sum(a for *_rgb, a in pal_normal[off:off+colors])
-    inv_alpha = sum(a for *_rgb, a in pal_inverted[off:off+colors])
+    if np is not None:
+        norm_alpha = int(pal_normal[off:off+colors, 3].sum())
+        inv_alpha = int(pal_inverted[off:off+colors, 3].sum())
+    else:
+        norm_alpha = sum(a for *_rgb, a in pal_normal[off:off+colors])
+        inv_alpha = sum(a for *_rgb, a in pal_inverted[off:off+colors])
     return pal_inverted if inv_alpha > norm_alpha else pal_normal
 
 # ---------------- quantization ----------------
-def quantize_tile_numpy_safe(png_arr, x0, y0, w, h, pal_slice_arr):
+if np is not None:
+    # 5-bit channel value -> the 8-bit value argb1555_normal/inverted expand it to,
+    # and the reverse map (-1 for 8-bit values no 5-bit value expands to).
+    _EXPAND5 = (np.arange(32, dtype=np.int32) * 255) // 31
+    _GRID5 = np.full(256, -1, dtype=np.int32)
+    _GRID5[_EXPAND5] = np.arange(32, dtype=np.int32)
+
+_LUT_UNSET = 0xFFFF
+
+
+def prepare_palette(pal_slice_arr):
+    """
+    Palette-side data for quantize_tile_numpy_safe; build once per palette slice.
+
+    Returns the int32 palette, its float32 transpose and squared norms for the distance
+    search, and a 65536-entry ARGB1555 -> index table that quantize_tile_numpy_safe
+    fills in as new colors show up.
+    """
+    pal_i = pal_slice_arr.astype(np.int32)
+    pal_t = np.ascontiguousarray(pal_i.T, dtype=np.float32)
+    pal_norm = (pal_i * pal_i).sum(axis=1).astype(np.float32)
+    lut16 = np.full(65536, _LUT_UNSET, dtype=np.uint16)
+    return pal_i, pal_t, pal_norm, lut16
+
+
+_nearest_kernel = None
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _nearest_kernel(colors, pal_i):
+        # Scalar int32 distances, no temporaries; strict < keeps the first minimum like argmin.
+        n = colors.shape[0]
+        out = np.empty(n, dtype=np.uint8)
+        for i in range(n):
+            r = colors[i, 0]
+            g = colors[i, 1]
+            b = colors[i, 2]
+            a = colors[i, 3]
+            best = 1 << 30
+            best_j = 0
+            for j in range(pal_i.shape[0]):
+                dr = r - pal_i[j, 0]
+                dg = g - pal_i[j, 1]
+                db = b - pal_i[j, 2]
+                da = a - pal_i[j, 3]
+                d = dr * dr + dg * dg + db * db + da * da
+                if d < best:
+                    best = d
+                    best_j = j
+            out[i] = best_j
+        return out
+
+
+def _nearest_index(colors, prep):
+    pal_i, pal_t, pal_norm, _lut16 = prep
+    if _nearest_kernel is not None:
+        return _nearest_kernel(np.ascontiguousarray(colors, dtype=np.int32), pal_i)
+    # Nearest-color search.
+    # |t - p|^2 = |t|^2 - 2 t.p + |p|^2 and |t|^2 is the same for every palette entry,
+    # so one (N, 4) x (4, P) product ranks the entries without an (N, P, 4) diff tensor.
+    # float32 sends the product through BLAS and stays exact: every term is an integer
+    # below 2 * 4 * 255**2, far under float32's 2**24, so ties still go to the first entry.
+    dist = pal_norm - 2 * (colors.astype(np.float32) @ pal_t)
+    return np.argmin(dist, axis=1)
+
+
+def quantize_tile_numpy_safe(png_arr, x0, y0, w, h, pal_slice_arr, prep=None):
     """
     Safe vectorized nearest palette lookup.
 
@@ -210,51 +430,111 @@ def quantize_tile_numpy_safe(png_arr, x0, y0, w, h, pal_slice_arr):
     up to 255, causing wrong palette indexes and visible sprite corruption.
     """
     tile = png_arr[y0:y0+h, x0:x0+w, :].reshape(-1, 4)
-
-    # Exact-color fast path. Exported/edited sprites often already use palette colors.
-    pal_u8 = pal_slice_arr.astype(np.uint8, copy=False)
-    if len(pal_u8) <= 256:
-        # Pack RGBA into uint32 keys for exact matching.
-        tile_keys = (tile[:, 0].astype(np.uint32) << 24) | (tile[:, 1].astype(np.uint32) << 16) | (tile[:, 2].astype(np.uint32) << 8) | tile[:, 3].astype(np.uint32)
-        pal_keys = (pal_u8[:, 0].astype(np.uint32) << 24) | (pal_u8[:, 1].astype(np.uint32) << 16) | (pal_u8[:, 2].astype(np.uint32) << 8) | pal_u8[:, 3].astype(np.uint32)
-        order = np.argsort(pal_keys)
-        sorted_keys = pal_keys[order]
-        pos = np.searchsorted(sorted_keys, tile_keys)
-        exact = (pos < len(sorted_keys)) & (sorted_keys[np.minimum(pos, len(sorted_keys)-1)] == tile_keys)
-        if exact.all():
-            return order[pos].astype(np.uint8)
-
-    # Nearest-color fallback. int32 prevents overflow in squared distance.
-    tile_i = tile.astype(np.int32)
-    pal_i = pal_slice_arr.astype(np.int32)
-    diff = tile_i[:, None, :] - pal_i[None, :, :]
-    dist = np.sum(diff * diff, axis=2, dtype=np.int32)
-    return np.argmin(dist, axis=1).astype(np.uint8)
-
-
-def quantize_tile_python(png, x0, y0, w, h, pal_slice):
-    """Original safe Python nearest-color loop."""
-    src = png.load()
+    if prep is None:
+        prep = prepare_palette(pal_slice_arr)
+    lut16 = prep[3]
+    idxs = np.empty(len(tile), dtype=np.uint8)
+
+    # Pixels whose channels are exact 5-bit expansions with alpha 0/255 (everything the
+    # exporter writes) are one ARGB1555 word away from their palette index. A word's
+    # nearest entry is computed the first time it is seen and reused from lut16 after.
+    r5 = _GRID5[tile[:, 0]]
+    g5 = _GRID5[tile[:, 1]]
+    b5 = _GRID5[tile[:, 2]]
+    a = tile[:, 3]
+    on_grid = ((r5 | g5 | b5) >= 0) & ((a == 0) | (a == 255))
+    if on_grid.any():
+        words = ((a[on_grid] == 255).astype(np.int32) << 15) | (r5[on_grid] << 10) | (g5[on_grid] << 5) | b5[on_grid]
+        got = lut16[words]
+        unset = got == _LUT_UNSET
+        if unset.any():
+            new = np.unique(words[unset])
+            colors = np.stack([
+                _EXPAND5[(new >> 10) & 0x1F],
+                _EXPAND5[(new >> 5) & 0x1F],
+                _EXPAND5[new & 0x1F],
+                np.where(new >> 15, 255, 0),
+            ], axis=1)
+            lut16[new] = _nearest_index(colors, prep)
+            got = lut16[words]
+        idxs[on_grid] = got
+
+    off_grid = ~on_grid
+    if off_grid.any():
+        idxs[off_grid] = _nearest_index(tile[off_grid], prep)
+    return idxs
+
+
+def quantize_tile_python(src, x0, y0, w, h, pal_slice):
+    """Original safe Python nearest-color loop over a PNG pixel-access object."""
+    # Exact palette colors map straight to their first index; anything else is searched
+    # once and remembered, since a sprite reuses the same few colors over and over.
+    known = {}
+    for j, c in enumerate(pal_slice):
+        known.setdefault(tuple(c), j)
     out = [0] * (w * h)
     k = 0
     for y in range(y0, y0 + h):
         for x in range(x0, x0 + w):
-            r, g, b, a = src[x, y]
-            best = 10**12
-            idx = 0
-            for j, (pr, pg, pb, pa) in enumerate(pal_slice):
-                dr = r - pr
-                dg = g - pg
-                db = b - pb
-                da = a - pa
-                d = dr*dr + dg*dg + db*db + da*da
-                if d < best:
-                    best = d
-                    idx = j
+            px = src[x, y]
+            idx = known.get(px)
+            if idx is None:
+                r, g, b, a = px
+                best = 10**12
+                idx = 0
+                for j, (pr, pg, pb, pa) in enumerate(pal_slice):
+                    dr = r - pr
+                    dg = g - pg
+                    db = b - pb
+                    da = a - pa
+                    d = dr*dr + dg*dg + db*db + da*da
+                    if d < best:
+                        best = d
+                        idx = j
+                known[px] = idx
             out[k] = idx
             k += 1
     return out
 
+# ---------------- BIN I/O ----------------
+def load_bin(path: str) -> mmap.mmap:
+    # Copy-on-write map: pages are read on demand and edits stay private until saved.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+def merge_patches(patches: List[Tuple[int, bytes]]):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs = []
+    for k in sorted(range(len(patches)), key=lambda k: patches[k][0]):
+        off, blob = patches[k]
+        end = off + len(blob)
+        if runs and off <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off, end, [k]])
+    for start, end, members in runs:
+        run = bytearray(end - start)
+        for k in sorted(members):
+            off, blob = patches[k]
+            run[off-start:off-start+len(blob)] = blob
+        yield start, run
+
+def save_patches(src_path: str, out_path: str, patches: List[Tuple[int, bytes]]):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path, out_path)):
+        shutil.copyfile(src_path, out_path)
+    fd = os.open(out_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+    try:
+        for start, run in merge_patches(patches):
+            if hasattr(os, "pwrite"):
+                os.pwrite(fd, run, start)
+            else:
+                os.lseek(fd, start, os.SEEK_SET)
+                os.write(fd, run)
+    finally:
+        os.close(fd)
+
 # ---------------- filename parser ----------------
 RE_NAME_A = re.compile(r"^(\d+)_(\d+)_(\d+)\.png$", re.IGNORECASE)
 RE_NAME_B = re.compile(r"^(\d+)_(\d+)-(\d+)\.png$", re.IGNORECASE)
@@ -265,6 +545,143 @@ def parse_name(fname: str):
         return None
     return int(m.group(1)), int(m.group(2)), int(m.group(3))
 
+# ---------------- PNG loading ----------------
+def load_png(path: str, as_array: bool = True):
+    """
+    Decode a PNG to RGBA. Returns an (H, W, 4) uint8 array, or the converted PIL image
+    when as_array is false or NumPy is missing.
+    """
+    with Image.open(path) as im:
+        png = im.convert("RGBA")
+    if not as_array or np is None:
+        return png
+    return np.asarray(png, dtype=np.uint8)
+
+# ---------------- per-PNG worker ----------------
+# Shared read-only tables for process_png; set once per worker process.
+_PNG_CTX: dict = {}
+_PAL_CACHE: dict = {}
+
+def _init_png_worker(ctx):
+    global _PNG_CTX
+    _PNG_CTX = ctx
+    _PAL_CACHE.clear()
+
+
+def process_png(path):
+    """
+    Quantize and pack one PNG against the shared tables.
+
+    Returns (log lines, [(char_off, packed)], successes, failures); patches made
+    before an error are kept, as the in-place loop used to leave them in data.
+    """
+    ctx = _PNG_CTX
+    images = ctx["images"]
+    use_numpy = ctx["use_numpy"]
+    lines: List[str] = []
+    patches: List[Tuple[int, bytes]] = []
+
+    fname = os.path.basename(path)
+    parsed = parse_name(fname)
+    if not parsed:
+        lines.append(f"[skip] {fname}: name does not match INDEX_SUBIMAGE_BANK.png or INDEX_SUBIMAGE-BANK.png")
+        return lines, patches, 0, 0
+
+    image_index, subimage, file_bank = parsed
+    if not (0 <= image_index < len(images)):
+        lines.append(f"[err] {fname}: image_index {image_index} out of range 0..{len(images)-1}")
+        return lines, patches, 0, 1
+
+    key = (image_index, subimage)
+    if key not in ctx["subinfo"]:
+        lines.append(f"[err] {fname}: subimage {subimage} not found for image {image_index}")
+        return lines, patches, 0, 1
+
+    info = ctx["subinfo"][key]
+    W = info["W"]
+    H = info["H"]
+    min_x = info["min_x"]
+    min_y = info["min_y"]
+    sprs = info["sprs"]
+    idef = images[image_index]
+
+    try:
+        png = load_png(path, use_numpy)
+    except Exception as e:
+        lines.append(f"[err] {fname}: cannot open PNG ({e})")
+        return lines, patches, 0, 1
+
+    png_size = (png.shape[1], png.shape[0]) if use_numpy else png.size
+    if png_size != (W, H):
+        lines.append(f"[err] {fname}: PNG size {png_size} must match target composed size {(W, H)}")
+        return lines, patches, 0, 1
+
+    first_bpp = sprs[0].bpp
+    colors_first = 1 << first_bpp
+    step_first = colors_first if ctx["palette_step"] == "colors" else 4
+    base = idef.palette_start_index * 4
+    pal_rgba = choose_palette_for_image(ctx["alpha"], ctx["pal_normal"], ctx["pal_inverted"], base, file_bank, step_first, colors_first)
+
+    if ctx["dry_run"]:
+        lines.append(f"[DRY] {fname}: will write image_index={image_index}, subimage={subimage}, bank={file_bank}, size={W}x{H}")
+        return lines, patches, 1, 0
+
+    # Every sprite below reads a window of the same decoded buffer.
+    if use_numpy:
+        png_arr = png
+    else:
+        png_src = png.load()
+
+    # (bpp, bank) -> (slice, quantizer tables); a subimage only ever uses a handful.
+    use_attr_palette = ctx["use_attr_palette"]
+    step_by_colors = ctx["palette_step"] == "colors"
+    by_bank = {}
+    for s in sprs:
+        bank_idx = s.attr_bank if use_attr_palette else file_bank
+        cached = by_bank.get((s.bpp, bank_idx))
+        if cached is None:
+            colors = 1 << s.bpp
+            step_this = colors if step_by_colors else 4
+            pal_off = base + bank_idx * step_this
+
+            if pal_off < 0 or pal_off + colors > len(pal_rgba):
+                lines.append(f"[err] {fname}: palette slice out of range: off={pal_off}, colors={colors}, palette_len={len(pal_rgba)}")
+                return lines, patches, 0, 1
+
+            # Slice plus its quantizer-side tables, shared by every sprite using that bank.
+            pal_key = (id(pal_rgba), pal_off, colors, use_numpy)
+            cached = _PAL_CACHE.get(pal_key)
+            if cached is None:
+                raw_slice = pal_rgba[pal_off:pal_off + colors]
+                if use_numpy:
+                    cached = (raw_slice, prepare_palette(raw_slice))
+                else:
+                    # Plain ints for the Python quantizer; uint8 scalars would wrap on subtraction.
+                    cached = (raw_slice.tolist() if np is not None else raw_slice, None)
+                _PAL_CACHE[pal_key] = cached
+            by_bank[(s.bpp, bank_idx)] = cached
+        pal_slice, pal_prep = cached
+
+        dx = s.ox - min_x
+        dy = s.oy - min_y
+
+        if use_numpy:
+            idxs = quantize_tile_numpy_safe(png_arr, dx, dy, s.w, s.h, pal_slice, pal_prep)
+        else:
+            idxs = quantize_tile_python(png_src, dx, dy, s.w, s.h, pal_slice)
+
+        packed = pack_bits_msb_fast(idxs, s.bpp, expected_nbytes=s.nbytes)
+        char_off = ctx["chars_base"] + s.charnum * s.nbytes
+
+        if char_off < 0 or char_off + s.nbytes > ctx["data_len"]:
+            lines.append(f"[err] {fname}: char write out of range: char_off=0x{char_off:X}, nbytes={s.nbytes}")
+            return lines, patches, 0, 1
+
+        patches.append((char_off, packed))
+
+    lines.append(f"[OK]  {fname}: replaced image {image_index}, subimage {subimage} using bank {file_bank}")
+    return lines, patches, 1, 0
+
 # ---------------- main ----------------
 def main():
     ap = argparse.ArgumentParser(
@@ -279,13 +696,13 @@ def main():
     ap.add_argument("--recursive", action="store_true", help="Recurse into subfolders")
     ap.add_argument("--package-offset", default=None, help="Override package base, e.g. 0x1EF000")
     ap.add_argument("--no-numpy", action="store_true", help="Disable NumPy path and use original Python quantizer")
+    ap.add_argument("--jobs", type=int, default=1, help="Quantize PNGs in this many worker processes (ignored in frozen builds)")
     ap.add_argument("--dry-run", action="store_true", help="List planned changes only")
     args = ap.parse_args()
 
     use_numpy = (np is not None) and (not args.no_numpy)
 
-    with open(args.bin, "rb") as f:
-        data = bytearray(f.read())
+    data = load_bin(args.bin)
 
     if args.package_offset is not None:
         s = args.package_offset.strip().lower()
@@ -299,13 +716,22 @@ def main():
         block = data[pkg_off: pkg_off + chars + 1_000_000]
         offs = (img_defs, spr_defs, palettes, chars)
     else:
-        pkg_off, block, offs = robust_scan(data)
+        cached_off = load_cached_package_offset(args.bin)
+        cached = _validate_package_at(data, cached_off) if cached_off is not None else None
+        if cached is not None:
+            pkg_off = cached_off
+            block, offs = cached
+        else:
+            pkg_off, block, offs = robust_scan(data)
+            if not args.dry_run:
+                save_cached_package_offset(args.bin, pkg_off)
 
     images, sprites, palette_words, _chars_offset = parse_package(block, offs)
     bin_chars_base = pkg_off + offs[3]
 
     # Precompute subimage geometry and sprite lists once.
-    subinfo: Dict[Tuple[int, int], dict] = {}
+    keys: List[Tuple[int, int]] = []
+    spans: List[Tuple[int, int]] = []
     for img_idx, idef in enumerate(images):
         spp = idef.width * idef.height
         if spp == 0:
@@ -317,18 +743,19 @@ def main():
         subimages = max(1, total_for_img // spp)
         for si in range(subimages):
             spr0 = idef.sprite_start_index + si * spp
-            sprs = sprites[spr0: spr0 + spp]
-            min_x = min(s.ox for s in sprs)
-            min_y = min(s.oy for s in sprs)
-            max_x = max(s.ox + s.w for s in sprs)
-            max_y = max(s.oy + s.h for s in sprs)
-            subinfo[(img_idx, si)] = {
-                "W": max_x - min_x,
-                "H": max_y - min_y,
-                "min_x": min_x,
-                "min_y": min_y,
-                "sprs": sprs,
-            }
+            keys.append((img_idx, si))
+            spans.append((spr0, min(spr0 + spp, len(sprites))))
+
+    spr_tab = np.frombuffer(block, dtype=SPRITE_DEF_DTYPE, count=len(sprites), offset=offs[1]) if np is not None else None
+    subinfo: Dict[Tuple[int, int], dict] = {}
+    for key, (start, end), (min_x, min_y, max_x, max_y) in zip(keys, spans, subimage_bounds(sprites, spans, spr_tab)):
+        subinfo[key] = {
+            "W": max_x - min_x,
+            "H": max_y - min_y,
+            "min_x": min_x,
+            "min_y": min_y,
+            "sprs": sprites[start:end],
+        }
 
     # Collect PNG files.
     paths = []
@@ -343,123 +770,53 @@ def main():
                 paths.append(os.path.join(args.input_dir, fn))
     paths.sort()
     if not paths:
+        data.close()
         print("No PNGs found.")
         return
 
     pal_normal, pal_inverted = build_palette_rgba_lists(palette_words)
-    pal_cache = {}
+    ctx = {
+        "images": images,
+        "subinfo": subinfo,
+        "pal_normal": pal_normal,
+        "pal_inverted": pal_inverted,
+        "alpha": args.alpha,
+        "palette_step": args.palette_step,
+        "use_attr_palette": args.use_attr_palette,
+        "use_numpy": use_numpy,
+        "dry_run": args.dry_run,
+        "chars_base": bin_chars_base,
+        "data_len": len(data),
+    }
+
+    # PNGs are independent until their characters land in data, so --jobs can quantize
+    # them in worker processes; patches are applied here in path order (later files still win).
+    # Frozen builds stay serial: spawned workers would relaunch the executable, not this code.
+    workers = 1 if args.dry_run or getattr(sys, "frozen", False) else min(len(paths), max(1, args.jobs))
+    if workers <= 1:
+        _init_png_worker(ctx)
+        results = map(process_png, paths)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_png_worker, initargs=(ctx,)) as ex:
+            results = list(ex.map(process_png, paths, chunksize=max(1, len(paths) // (workers * 4))))
 
     successes = 0
     failures = 0
-
-    for path in paths:
-        fname = os.path.basename(path)
-        parsed = parse_name(fname)
-        if not parsed:
-            print(f"[skip] {fname}: name does not match INDEX_SUBIMAGE_BANK.png or INDEX_SUBIMAGE-BANK.png")
-            continue
-
-        image_index, subimage, file_bank = parsed
-        if not (0 <= image_index < len(images)):
-            print(f"[err] {fname}: image_index {image_index} out of range 0..{len(images)-1}")
-            failures += 1
-            continue
-
-        key = (image_index, subimage)
-        if key not in subinfo:
-            print(f"[err] {fname}: subimage {subimage} not found for image {image_index}")
-            failures += 1
-            continue
-
-        info = subinfo[key]
-        W = info["W"]
-        H = info["H"]
-        min_x = info["min_x"]
-        min_y = info["min_y"]
-        sprs = info["sprs"]
-        idef = images[image_index]
-
-        try:
-            with Image.open(path) as im:
-                png = im.convert("RGBA")
-        except Exception as e:
-            print(f"[err] {fname}: cannot open PNG ({e})")
-            failures += 1
-            continue
-
-        if png.size != (W, H):
-            print(f"[err] {fname}: PNG size {png.size} must match target composed size {(W, H)}")
-            failures += 1
-            continue
-
-        first_bpp = sprs[0].bpp
-        colors_first = 1 << first_bpp
-        step_first = colors_first if args.palette_step == "colors" else 4
-        base = idef.palette_start_index * 4
-        pal_rgba = choose_palette_for_image(args.alpha, pal_normal, pal_inverted, base, file_bank, step_first, colors_first)
-
-        if args.dry_run:
-            print(f"[DRY] {fname}: will write image_index={image_index}, subimage={subimage}, bank={file_bank}, size={W}x{H}")
-            successes += 1
-            continue
-
-        png_arr = np.asarray(png, dtype=np.uint8) if use_numpy else None
-
-        for s in sprs:
-            bank_idx = s.attr_bank if args.use_attr_palette else file_bank
-            colors = 1 << s.bpp
-            step_this = colors if args.palette_step == "colors" else 4
-            pal_off = base + bank_idx * step_this
-
-            if pal_off < 0 or pal_off + colors > len(pal_rgba):
-                print(f"[err] {fname}: palette slice out of range: off={pal_off}, colors={colors}, palette_len={len(pal_rgba)}")
-                failures += 1
-                break
-
-            pal_key = (id(pal_rgba), pal_off, colors, use_numpy)
-            pal_slice = pal_cache.get(pal_key)
-            if pal_slice is None:
-                raw_slice = pal_rgba[pal_off:pal_off + colors]
-                pal_slice = np.asarray(raw_slice, dtype=np.uint8) if use_numpy else raw_slice
-                pal_cache[pal_key] = pal_slice
-
-            dx = s.ox - min_x
-            dy = s.oy - min_y
-
-            if use_numpy:
-                idxs = quantize_tile_numpy_safe(png_arr, dx, dy, s.w, s.h, pal_slice)
-            else:
-                idxs = quantize_tile_python(png, dx, dy, s.w, s.h, pal_slice)
-
-            packed = pack_bits_msb_fast(idxs, s.bpp, expected_nbytes=s.nbytes)
-            char_off = bin_chars_base + s.charnum * s.nbytes
-
-            if char_off < 0 or char_off + s.nbytes > len(data):
-                print(f"[err] {fname}: char write out of range: char_off=0x{char_off:X}, nbytes={s.nbytes}")
-                failures += 1
-                break
-
-            data[char_off:char_off + s.nbytes] = packed
-        else:
-            print(f"[OK]  {fname}: replaced image {image_index}, subimage {subimage} using bank {file_bank}")
-            successes += 1
-            continue
-
-        # Only reached if the sprite loop broke because of an error.
-        continue
+    all_patches = []
+    for lines, patches, ok, failed in results:
+        for line in lines:
+            print(line)
+        all_patches.extend(patches)
+        successes += ok
+        failures += failed
+    data.close()
 
     if args.dry_run:
         print(f"[DRY] Completed: {successes} planned, {failures} skipped/failed")
     else:
-        # Safe write: if output equals input, write to temp then replace.
-        if os.path.abspath(args.out) == os.path.abspath(args.bin):
-            tmp_out = args.out + ".tmp"
-            with open(tmp_out, "wb") as f:
-                f.write(data)
-            os.replace(tmp_out, args.out)
-        else:
-            with open(args.out, "wb") as f:
-                f.write(data)
+        save_patches(args.bin, args.out, all_patches)
+        # Only characters changed, so the package is where it was; keep the sidecar current.
+        save_cached_package_offset(args.out, pkg_off)
         print(f"[DONE] Replaced {successes} file(s); {failures} skipped/failed. Wrote: {args.out}")
 
 if __name__ == "__main__":
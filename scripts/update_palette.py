@@ -16,13 +16,20 @@ Speedups:
 """
 
 import argparse
+import mmap
 import os
 import re
+import shutil
 import struct
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Set, Optional
 from PIL import Image
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 # ---------- low-level helpers ----------
 def le16(b, o): return struct.unpack_from("<H", b, o)[0]
 def le32(b, o): return struct.unpack_from("<I", b, o)[0]
@@ -42,6 +49,14 @@ def argb_to_1555(r, g, b, a, inverted=True):
 
     return (a_bit << 15) | (r5 << 10) | (g5 << 5) | b5
 
+def argb_to_1555_array(rgba, inverted=True):
+    """argb_to_1555 over (P, 4) RGBA rows at once; returns a uint16 array of words."""
+    arr = np.asarray(rgba, dtype=np.int32).reshape(-1, 4)
+    rgb5 = np.clip((arr[:, :3] * 31 + 127) // 255, 0, 31)
+    opaque = arr[:, 3] >= 128
+    a_bit = (~opaque if inverted else opaque).astype(np.int32)
+    return ((a_bit << 15) | (rgb5[:, 0] << 10) | (rgb5[:, 1] << 5) | rgb5[:, 2]).astype(np.uint16)
+
 @dataclass
 class ImageDef:
     sprite_start_index: int
@@ -80,6 +95,10 @@ def sprite_dims(attr):
     return w, h, bpp
 
 # ---------- package scan / parse ----------
+# On-disk record layouts of the image and sprite definition tables.
+IMAGE_DEF_DTYPE = np.dtype([("spr_start", "<u2"), ("w", "u1"), ("h", "u1"), ("pal_start", "<u2")]) if np is not None else None
+SPRITE_DEF_DTYPE = np.dtype([("charnum", "<u2"), ("ox", "<i2"), ("oy", "<i2"), ("attr", "<u2")]) if np is not None else None
+
 def _validate_package_at(data: bytes, off: int):
     size = len(data)
     if off < 0 or off + 16 > size:
@@ -136,6 +155,22 @@ def load_package_at_offset(data: bytes, package_offset):
     block, offs = result
     return off, block, offs
 
+def _header_candidates(data):
+    """Offsets whose 16-byte header passes the ordering, alignment and image-count checks."""
+    size = len(data)
+    n = len(range(0, size - 16, 4))
+    if np is None or n <= 0:
+        return range(0, size - 16, 4)
+    # Header words at 4-byte steps are just consecutive u32s; test all of them at once.
+    words = np.frombuffer(data, dtype="<u4", count=size // 4).astype(np.int64)
+    img_defs, spr_defs, palettes, chars = words[0:n], words[1:n+1], words[2:n+2], words[3:n+3]
+    mask = (0 < img_defs) & (img_defs < spr_defs) & (spr_defs < palettes) & (palettes < chars)
+    mask &= chars <= size - 4 * np.arange(n, dtype=np.int64)
+    img_len = spr_defs - img_defs
+    mask &= (img_len % 6 == 0) & ((palettes - spr_defs) % 8 == 0) & ((chars - palettes) % 2 == 0)
+    mask &= (1000 * 6 <= img_len) & (img_len <= 5000 * 6)
+    return (np.flatnonzero(mask) * 4).tolist()
+
 def robust_scan(data: bytes):
     """
     Fast-compatible robust scan.
@@ -155,7 +190,7 @@ def robust_scan(data: bytes):
     size = len(data)
     best = None
 
-    for off in range(0, size - 16, 4):
+    for off in _header_candidates(data):
         result = _validate_package_at(data, off)
         if result is None:
             continue
@@ -171,11 +206,48 @@ def robust_scan(data: bytes):
     _score, pkg_off, block, offs = best
     return pkg_off, block, offs
 
+# Sidecar "<bin>.pkgoff" holding "<offset> <size> <mtime_ns>" from the last successful scan,
+# in the same format export_sprites.py reads and writes.
+def _pkgoff_path(bin_path: str) -> str:
+    return bin_path + ".pkgoff"
+
+def load_cached_package_offset(bin_path: str) -> Optional[int]:
+    try:
+        with open(_pkgoff_path(bin_path), "r", encoding="ascii") as f:
+            off_s, size_s, mtime_s = f.read().split()
+        st = os.stat(bin_path)
+        if int(size_s) != st.st_size or int(mtime_s) != st.st_mtime_ns:
+            return None
+        return int(off_s, 16)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_package_offset(bin_path: str, package_offset: int):
+    try:
+        st = os.stat(bin_path)
+        with open(_pkgoff_path(bin_path), "w", encoding="ascii") as f:
+            f.write(f"0x{package_offset:X} {st.st_size} {st.st_mtime_ns}\n")
+    except OSError:
+        pass
+
 def parse(block: bytes, offs):
     img_defs, spr_defs, palettes, _chars = offs
     num_images  = (spr_defs - img_defs) // 6
     num_sprites = (palettes - spr_defs) // 8
 
+    if np is not None:
+        # One typed view per table; the dataclasses are filled from whole columns.
+        img_tab = np.frombuffer(block, dtype=IMAGE_DEF_DTYPE, count=num_images, offset=img_defs)
+        images = [ImageDef(*row) for row in img_tab.tolist()]
+
+        spr_tab = np.frombuffer(block, dtype=SPRITE_DEF_DTYPE, count=num_sprites, offset=spr_defs)
+        attr = spr_tab["attr"].astype(np.int64)
+        sprites = [SpriteDef(*row) for row in zip(
+            spr_tab["charnum"].tolist(), spr_tab["ox"].tolist(), spr_tab["oy"].tolist(), attr.tolist(),
+            (8 << ((attr >> 4) & 0x3)).tolist(), (8 << ((attr >> 6) & 0x3)).tolist(),
+            ((attr & 0x3) * 2 + 2).tolist(), ((attr >> 8) & 0xF).tolist())]
+        return images, sprites, palettes
+
     images = []
     for i in range(num_images):
         o = img_defs + i * 6
@@ -286,6 +358,28 @@ def _rgba_key_from_color(rgba):
     r, g, b, a = rgba
     return (int(r), int(g), int(b), 255 if int(a) >= 128 else 0)
 
+def _unique_colors_in_order(img: Image.Image, max_colors: int):
+    """First max_colors distinct colors in pixel scan order, alpha thresholded to 0/255."""
+    if np is None:
+        unique = []
+        seen = set()
+        for rgba in img.getdata():
+            key = _rgba_key_from_color(rgba)
+            if key not in seen:
+                seen.add(key)
+                unique.append(key)
+                if len(unique) >= max_colors:
+                    break
+        return unique
+
+    arr = np.asarray(img, dtype=np.uint8).reshape(-1, 4).astype(np.uint32)
+    alpha = np.where(arr[:, 3] >= 128, 255, 0).astype(np.uint32)
+    keys = (arr[:, 0] << 24) | (arr[:, 1] << 16) | (arr[:, 2] << 8) | alpha
+    # np.unique sorts by value; its first-occurrence indexes put scan order back.
+    uniq, first = np.unique(keys, return_index=True)
+    uniq = uniq[np.argsort(first)][:max_colors]
+    return [((k >> 24) & 0xFF, (k >> 16) & 0xFF, (k >> 8) & 0xFF, k & 0xFF) for k in uniq.tolist()]
+
 def _colors_from_getcolors(img: Image.Image, max_colors: int):
     """
     Fast path: returns ordered unique RGBA colors if img already has <= max_colors colors.
@@ -295,24 +389,13 @@ def _colors_from_getcolors(img: Image.Image, max_colors: int):
     if colors is None or len(colors) > max_colors:
         return None
 
-    unique = []
-    seen = set()
-
     # getcolors order is not guaranteed to match pixel scan order, so scan only
     # in the cheap <= max_colors case to preserve first-appearance-ish behavior.
-    for rgba in img.getdata():
-        key = _rgba_key_from_color(rgba)
-        if key not in seen:
-            seen.add(key)
-            unique.append(key)
-            if len(unique) >= max_colors:
-                break
-
-    return unique
+    return _unique_colors_in_order(img, max_colors)
 
 def build_palette_words_from_png(png_path: str, max_colors: int, inverted_alpha: bool):
     """
-    Returns (words, png_size).
+    Returns (words, png_size); words is a uint16 array when NumPy is available.
 
     Behavior matches the previous script's intent:
       - use PNG colors if already within max_colors
@@ -335,15 +418,7 @@ def build_palette_words_from_png(png_path: str, max_colors: int, inverted_alpha:
         ).convert("RGBA")
         reduced.putalpha(alpha)
 
-        unique = []
-        seen = set()
-        for rgba in reduced.getdata():
-            key = _rgba_key_from_color(rgba)
-            if key not in seen:
-                seen.add(key)
-                unique.append(key)
-                if len(unique) >= max_colors:
-                    break
+        unique = _unique_colors_in_order(reduced, max_colors)
 
     if not unique:
         unique = [(0, 0, 0, 0)]
@@ -351,14 +426,17 @@ def build_palette_words_from_png(png_path: str, max_colors: int, inverted_alpha:
     while len(unique) < max_colors:
         unique.append(unique[-1])
 
-    words = [argb_to_1555(r, g, b, a, inverted=inverted_alpha) for (r, g, b, a) in unique[:max_colors]]
+    if np is not None:
+        words = argb_to_1555_array(unique[:max_colors], inverted=inverted_alpha)
+    else:
+        words = [argb_to_1555(r, g, b, a, inverted=inverted_alpha) for (r, g, b, a) in unique[:max_colors]]
     return words, png_size
 
 # Old public function name kept for compatibility with any direct usage.
 def build_palette_from_png(png_path: str, max_colors: int, inverted_alpha: bool):
     return build_palette_words_from_png(png_path, max_colors, inverted_alpha)
 
-def update_one(data, pkg_off, offs, images, sprites, image_index, subimage, png_path, target_bank, alpha_mode, set_sprite_bank, dry_run):
+def update_one(data, pkg_off, offs, images, sprites, image_index, subimage, png_path, target_bank, alpha_mode, set_sprite_bank, dry_run, patches=None):
     img_defs_off, spr_defs_off, palettes_off, chars_off = offs
 
     if not (0 <= image_index < len(images)):
@@ -411,19 +489,39 @@ def update_one(data, pkg_off, offs, images, sprites, image_index, subimage, png_
         return
 
     # Write palette words faster than looping with struct.pack each time.
-    pal_bytes = struct.pack("<" + "H" * len(words), *words)
+    if np is not None:
+        pal_bytes = np.asarray(words, dtype="<u2").tobytes()
+    else:
+        pal_bytes = struct.pack("<" + "H" * len(words), *words)
     data[pal_bytes_off:pal_bytes_off + len(pal_bytes)] = pal_bytes
+    if patches is not None:
+        patches.append((pal_bytes_off, pal_bytes))
 
     # Optionally set per-sprite bank nibble.
     if set_sprite_bank:
         bank_bits = (bank & 0xF) << 8
-        for idx in range(spr0, spr0 + spp):
-            s_off = pkg_off + spr_defs_off + idx * 8 + 6
-            attr = le16(data, s_off)
-            attr = (attr & ~(0xF << 8)) | bank_bits
-            data[s_off:s_off + 2] = struct.pack("<H", attr)
-
-            # Keep parsed sprite objects in sync for later updates in same GUI run.
+        defs_off = pkg_off + spr_defs_off + spr0 * 8
+        attr_off = defs_off + 6
+        if np is not None:
+            # The attr word of each 8-byte SpriteDef, edited in place through one strided view.
+            attrs = np.ndarray((spp,), dtype="<u2", buffer=data, offset=attr_off, strides=(8,))
+            attrs &= 0xF0FF
+            attrs |= bank_bits
+            new_attrs = attrs.tolist()
+        else:
+            new_attrs = []
+            for k in range(spp):
+                s_off = attr_off + k * 8
+                attr = le16(data, s_off)
+                attr = (attr & ~(0xF << 8)) | bank_bits
+                data[s_off:s_off + 2] = struct.pack("<H", attr)
+                new_attrs.append(attr)
+        if patches is not None:
+            # The touched SpriteDefs are contiguous, so they go out as one run.
+            patches.append((defs_off, bytes(data[defs_off:defs_off + spp * 8])))
+
+        # Keep parsed sprite objects in sync for later updates in same GUI run.
+        for idx, attr in enumerate(new_attrs, start=spr0):
             try:
                 sprites[idx].attr = attr
                 sprites[idx].attr_bank = bank
@@ -432,6 +530,45 @@ def update_one(data, pkg_off, offs, images, sprites, image_index, subimage, png_
 
     print(f"[OK] img {image_index} si {subimage}: wrote {colors} colors to bank {bank}")
 
+# ---------- BIN I/O ----------
+def load_bin(path: str) -> mmap.mmap:
+    # Copy-on-write map: pages are read on demand and edits stay private until saved.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+def merge_patches(patches: List[Tuple[int, bytes]]):
+    """Merge (offset, bytes) patches into contiguous runs; where runs overlap, later patches win."""
+    runs = []
+    for k in sorted(range(len(patches)), key=lambda k: patches[k][0]):
+        off, blob = patches[k]
+        end = off + len(blob)
+        if runs and off <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], end)
+            runs[-1][2].append(k)
+        else:
+            runs.append([off, end, [k]])
+    for start, end, members in runs:
+        run = bytearray(end - start)
+        for k in sorted(members):
+            off, blob = patches[k]
+            run[off-start:off-start+len(blob)] = blob
+        yield start, run
+
+def save_patches(src_path: str, out_path: str, patches: List[Tuple[int, bytes]]):
+    # Only the patched runs hit the disk; a separate --out starts as a plain copy of the input.
+    if not (os.path.exists(out_path) and os.path.samefile(src_path, out_path)):
+        shutil.copyfile(src_path, out_path)
+    fd = os.open(out_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+    try:
+        for start, run in merge_patches(patches):
+            if hasattr(os, "pwrite"):
+                os.pwrite(fd, run, start)
+            else:
+                os.lseek(fd, start, os.SEEK_SET)
+                os.write(fd, run)
+    finally:
+        os.close(fd)
+
 # ---------- batch driver ----------
 FNAME_RE = re.compile(r"^(\d+)_(\d+)_(\d+)\.(?:png|PNG)$")
 
@@ -468,16 +605,26 @@ def main():
     if not jobs:
         raise SystemExit(f"No files matching INDEX_SUBIMAGE_BANK.png found in {args.input_dir}")
 
-    with open(args.bin, "rb") as f:
-        data = bytearray(f.read())
+    data = load_bin(args.bin)
 
     if args.package_offset is not None:
         pkg_off, block, offs = load_package_at_offset(data, args.package_offset)
     else:
-        pkg_off, block, offs = robust_scan(data)
+        cached_off = load_cached_package_offset(args.bin)
+        cached = _validate_package_at(data, cached_off) if cached_off is not None else None
+        if cached is not None:
+            pkg_off = cached_off
+            block, offs = cached
+        else:
+            pkg_off, block, offs = robust_scan(data)
+            if not args.dry_run:
+                save_cached_package_offset(args.bin, pkg_off)
 
     images, sprites, _palettes_off = parse(block, offs)
 
+    # data still takes every edit so later jobs read what earlier ones wrote;
+    # the output only receives these ranges.
+    patches: List[Tuple[int, bytes]] = []
     for idx, sub, bank, png_path in jobs:
         update_one(
             data,
@@ -492,13 +639,16 @@ def main():
             args.alpha_mode,
             args.set_sprite_bank,
             args.dry_run,
+            patches,
         )
+    data.close()
 
     if args.dry_run:
         print(f"[DRY] Processed {len(jobs)} file(s). No output written.")
     else:
-        with open(args.out, "wb") as f:
-            f.write(data)
+        save_patches(args.bin, args.out, patches)
+        # Only palettes and sprite attrs changed, so the package is where it was.
+        save_cached_package_offset(args.out, pkg_off)
         print(f"[DONE] Updated {len(jobs)} palette bank(s). Wrote: {args.out}")
 
 if __name__ == "__main__":